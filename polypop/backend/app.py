@@ -1,110 +1,552 @@
 import os
 import time
-from flask import Flask, request, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_caching import Cache
 
 from config import config
 from services.search_service import SearchService
+from services.cache_codec import CacheCodec
 from services.cache_service import CacheService
-from utils.formatters import format_error_response
+from services.memory_cache import MemoryCache
+from services.shared_cache import open_shared_cache
+from services.single_flight import SingleFlight
+from services.upstream_scheduler import PRIORITIES
+from utils import metrics
+from utils.context import parse_context_budget
+from utils.fields import parse_fields, project_response
+from utils.formatters import format_error_response, format_cached_response, format_stream_event
+from utils.normalize import normalize_engines
+from utils.response_body import ENCODINGS, choose_encoding, content_etag, render_body, rendered_response
 
 
-def create_app(config_name: str = None):
+def create_app(config_name: str = None, config_overrides: dict = None):
 
     app = Flask(__name__)
     
     config_name = config_name or os.getenv('FLASK_ENV', 'default')
     app.config.from_object(config[config_name])
+    if config_overrides:
+        app.config.update(config_overrides)
 
     CORS(app)
     cache = Cache(app)
     
-    # Test cache connection
-    try:
-        with app.app_context():
-            cache.set('startup_test', 'working', timeout=10)
-            test_value = cache.get('startup_test')
-            if test_value == 'working':
-                print("✅ Redis cache connection successful!")
+    # Nothing here talks to Redis or loads an engine: the cache connects on
+    # first use and engines import on first search, so workers start fast.
+    # Load balancers should wait for /ready, which checks both.
+    cache_service = CacheService(
+        cache,
+        memory_cache=MemoryCache(
+            max_entries=app.config['CACHE_L1_MAX_ENTRIES'],
+            max_bytes=app.config['CACHE_L1_MAX_BYTES'],
+            default_timeout=app.config['CACHE_L1_TIMEOUT']
+        ),
+        invalidation_channel=app.config['CACHE_INVALIDATION_CHANNEL'],
+        codec=CacheCodec(
+            compression=app.config['CACHE_COMPRESSION'],
+            threshold=app.config['CACHE_COMPRESSION_THRESHOLD'],
+            level=app.config['CACHE_COMPRESSION_LEVEL']
+        ),
+        payload_format=app.config['CACHE_PAYLOAD_FORMAT'],
+        shared_cache=open_shared_cache(
+            app.config['CACHE_SHM_PATH'],
+            app.config['CACHE_SHM_SLOTS'],
+            app.config['CACHE_SHM_SLOT_BYTES']
+        ) if app.config['CACHE_SHM_ENABLED'] else None
+    )
+    search_service = SearchService(app.config, cache_service)
+    single_flight = SingleFlight(
+        cache_service.get_redis_client(),
+        lock_ttl=app.config['SINGLE_FLIGHT_LOCK_TTL'],
+        wait_timeout=app.config['SINGLE_FLIGHT_WAIT_TIMEOUT']
+    )
+    refresh_executor = ThreadPoolExecutor(
+        max_workers=app.config['THREAD_POOL_SIZE'],
+        thread_name_prefix='cache-refresh'
+    )
+    
+    metrics.QUEUE_DEPTH.set_function(lambda: refresh_executor._work_queue.qsize(), 'cache-refresh')
+    metrics.QUEUE_DEPTH.set_function(search_service.get_batch_queue_depth, 'batch')
+    for priority in PRIORITIES:
+        metrics.QUEUE_DEPTH.set_function(
+            lambda priority=priority: search_service.scheduler.waiting[priority], f"upstream-{priority}"
+        )
+    for name, bucket in search_service.scheduler.buckets.items():
+        metrics.UPSTREAM_RATE_LIMIT.set_function(lambda bucket=bucket: bucket.rate, name)
+    
+    @app.before_request
+    def start_timer():
+        g.started = time.perf_counter()
+    
+    @app.after_request
+    def record_request(response):
+        if 'started' in g:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.REQUEST_DURATION.labels(route, request.method, response.status_code).observe(
+                time.perf_counter() - g.started
+            )
+        return response
+    
+    default_engines = ','.join(app.config['ENABLED_ENGINES'])
+    
+    def get_latency_options(args) -> tuple:
+        """Read the optional deadline_ms and hedge request parameters"""
+        deadline_ms = args.get('deadline_ms')
+        try:
+            deadline_ms = int(deadline_ms) if deadline_ms is not None else None
+        except ValueError:
+            deadline_ms = None
+        hedge = args.get('hedge')
+        if hedge is not None:
+            hedge = hedge.lower() in ('1', 'true', 'yes')
+        return deadline_ms, hedge
+    
+    def read_search_args(args, normalize: bool = False) -> dict:
+        """
+        Read and validate the parameters of the search routes
+        
+        Shared with the ASGI entry point, so both validate alike.
+        
+        Args:
+            args: Query arguments, Flask's request.args or any mapping
+            normalize: Normalize the engine list, as cache keys need
+        
+        Returns:
+            Dict with query, engines, max_results, fields, context_budget,
+            deadline_ms and hedge
+        
+        Raises:
+            ValueError: If a parameter is missing or malformed
+        """
+        query = args.get('q', '').strip()
+        if not query:
+            raise ValueError('Query parameter "q" is required')
+        
+        engines = args.get('engines', default_engines).split(',')
+        if normalize:
+            engines = normalize_engines(engines, search_service.get_available_engines())
+        try:
+            max_results = int(args.get('max_results', app.config['DEFAULT_MAX_RESULTS']))
+        except ValueError:
+            raise ValueError('"max_results" must be an integer')
+        if max_results < 1:
+            raise ValueError('"max_results" must be at least 1')
+        deadline_ms, hedge = get_latency_options(args)
+        
+        return {
+            'query': query,
+            'engines': engines,
+            'max_results': min(max_results, app.config['MAX_RESULTS_LIMIT']),
+            'fields': parse_fields(args.get('fields')),
+            'context_budget': parse_context_budget(
+                args.get('context_budget', app.config['DEFAULT_CONTEXT_BUDGET'])
+            ),
+            'deadline_ms': deadline_ms,
+            'hedge': hedge
+        }
+    
+    def read_batch_spec(spec) -> dict:
+        """
+        Turn one /search/batch query spec into search parameters
+        
+        A spec is a query string, or an object of /search parameters in
+        which engines and fields may also be lists, and max_results and
+        context_budget integers.
+        
+        Args:
+            spec: Decoded JSON spec
+        
+        Returns:
+            Parameters for read_search_args, as a query string would give them
+        
+        Raises:
+            ValueError: If the spec or one of its values has the wrong type
+        """
+        if isinstance(spec, str):
+            return {'q': spec}
+        if not isinstance(spec, dict):
+            raise ValueError('Each query must be a string or an object')
+        
+        args = {}
+        for name in ('q', 'engines', 'max_results', 'fields', 'context_budget'):
+            value = spec.get(name)
+            if value is None or isinstance(value, str):
+                pass
+            elif name in ('engines', 'fields'):
+                if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                    raise ValueError(f'"{name}" must be a comma-separated string or a list of strings')
+                value = ','.join(value)
+            elif name in ('max_results', 'context_budget'):
+                if not isinstance(value, int) or isinstance(value, bool):
+                    raise ValueError(f'"{name}" must be an integer')
+                value = str(value)
             else:
-                print("❌ Redis cache test failed - value mismatch")
-    except Exception as e:
-        print(f"❌ Redis cache initialization error: {e}")
-        import traceback
-        traceback.print_exc()
+                raise ValueError(f'"{name}" must be a string')
+            if value is not None:
+                args[name] = value
+        return args
+    
+    def finish_response(response_dict: dict, params: dict) -> dict:
+        """Cut a full cached response down to a request's size, context budget and fields"""
+        return project_response(format_cached_response(
+            response_dict, params['query'], params['max_results'], params['context_budget']
+        ), params['fields'])
     
-    search_service = SearchService(app.config)
-    cache_service = CacheService(cache)
+    def store_response(
+        cache_key: str,
+        query: str,
+        response,
+        max_results: int = None,
+        fields: tuple = None,
+        context_budget: int = None
+    ) -> dict:
+        """Cache a search response and return it as a dict"""
+        response_dict = response.to_dict()
+        
+        timeout = app.config['CACHE_DEFAULT_TIMEOUT']
+        hard_timeout = app.config['CACHE_HARD_TIMEOUT']
+        
+        # Partial responses (errors or missed deadlines) are kept only
+        # briefly, and rebuilt after that from the per-engine cache, so
+        # only the missing engines are refetched. Without this, one engine
+        # that keeps missing the deadline would leave no query cached.
+        missing = response.missing_engines
+        if missing:
+            partial_timeout = app.config['PARTIAL_CACHE_TIMEOUT']
+            stored = response.count > 0 and partial_timeout > 0
+            for name in missing:
+                metrics.PARTIAL_RESPONSES.labels(
+                    name, response.engine_status[name], 'store' if stored else 'skip'
+                ).inc()
+            if not stored:
+                return response_dict
+            timeout = hard_timeout = partial_timeout
+        negative = not response.count
+        if negative:
+            # Nothing found: keep it briefly and flagged, with no stale period
+            timeout = hard_timeout = app.config['NEGATIVE_CACHE_EMPTY_TIMEOUT']
+            if timeout <= 0:
+                return response_dict
+            metrics.NEGATIVE_CACHE.labels('response', 'empty', 'store').inc()
+        
+        stored = dict(response_dict, negative_cached=negative)
+        fresh_until = time.time() + timeout
+        cache_service.set(cache_key, stored, timeout, hard_timeout)
+        print(f"💾 Cached {'empty ' if negative else ''}result for: {query}")
+        
+        # Render the body the next hit will be served while we are here
+        max_results = max_results or app.config['DEFAULT_MAX_RESULTS']
+        hit = project_response(format_cached_response(
+            dict(stored, cached=True, stale=False), query, max_results, context_budget
+        ), fields)
+        body_key = cache_service.get_body_key(cache_key, query, max_results, fields, context_budget)
+        render_response(body_key, hit, fresh_until, negative)
+        return response_dict
+    
+    def render_response(
+        body_key: str,
+        response_dict: dict,
+        fresh_until: float = None,
+        negative_cached: bool = False,
+        accept_encodings=None
+    ) -> dict:
+        """
+        Serialize a response once with its compressed variants, caching it while fresh
+        
+        A body that is not cached (no fresh_until) is sent once, so with
+        accept_encodings it is only compressed for the negotiated coding.
+        The ETag covers the content only, so a refresh that changes no
+        more than the engine statuses still answers 304.
+        """
+        codings = ENCODINGS
+        if fresh_until is None and accept_encodings is not None:
+            codings = (choose_encoding(accept_encodings),)
+        rendered = render_body(
+            app.json.dumps(response_dict).encode('utf-8'),
+            gzip_level=app.config['RESPONSE_GZIP_LEVEL'],
+            brotli_quality=app.config['RESPONSE_BROTLI_QUALITY'],
+            codings=codings,
+            etag=content_etag(response_dict)
+        )
+        if fresh_until is not None:
+            cache_service.set_body(body_key, rendered, fresh_until, negative_cached)
+        return rendered
+    
+    def send_rendered(rendered: dict) -> Response:
+        """Send a rendered body in the best accepted encoding, or 304 if the client has it"""
+        status, headers, body = rendered_response(rendered, request.accept_encodings, request.if_none_match)
+        return Response(body, status=status, headers=headers)
+    
+    def schedule_refresh(cache_key: str, query: str, engines: list):
+        """Refresh a stale entry off the request path, without a deadline"""
+        def refresh():
+            response = search_service.search_parallel(
+                query, engines, app.config['MAX_RESULTS_LIMIT'], use_cache=True, deadline_ms=0,
+                priority='prefetch'
+            )
+            return store_response(cache_key, query, response)
+        
+        single_flight.do_in_background(cache_key, refresh, refresh_executor)
+    
+    def get_body_key(cache_key: str, params: dict) -> str:
+        """Key of the rendered body for a request's spelling, size, fields and context budget"""
+        return cache_service.get_body_key(
+            cache_key, params['query'], params['max_results'], params['fields'], params['context_budget']
+        )
+    
+    def render_entry(cache_key: str, body_key: str, entry: dict, params: dict, accept_encodings=None) -> dict:
+        """
+        Render the response to a request from a lookup_entry result
+        
+        A stale entry is served as is and refreshed off the request path.
+        A fresh one is rendered once for the rest of its life, as the
+        first hit for this spelling and size; stale bodies are not kept.
+        """
+        query = params['query']
+        stale = entry['stale']
+        if stale:
+            print(f"♻️ Cache STALE for: {query}")
+            schedule_refresh(cache_key, query, params['engines'])
+        else:
+            print(f"✅ Cache HIT for: {query}")
+        cached_response = entry['value']
+        cached_response['cached'] = True
+        cached_response['stale'] = stale
+        
+        return render_response(
+            body_key,
+            finish_response(cached_response, params),
+            None if stale else entry['fresh_until'],
+            cached_response.get('negative_cached', False),
+            accept_encodings
+        )
     
 
     @app.route('/search/sequential', methods=['GET'])
     def search_sequential():
         """Sequential search without threading"""
-        query = request.args.get('q', '').strip()
-        if not query:
-            return jsonify(format_error_response('Query parameter "q" is required')), 400
-        
-        engines = request.args.get('engines', 'duckduckgo,bing').split(',')
-        max_results = min(int(request.args.get('max_results', app.config['DEFAULT_MAX_RESULTS'])), 
-                         app.config['MAX_RESULTS_LIMIT'])
+        try:
+            params = read_search_args(request.args)
+        except ValueError as e:
+            return jsonify(format_error_response(str(e))), 400
         
         try:
-            response = search_service.search_sequential(query, engines, max_results)
-            return jsonify(response.to_dict()), 200
+            response = search_service.search_sequential(params['query'], params['engines'], params['max_results'])
+            return jsonify(response.to_dict(params['fields'], params['context_budget'])), 200
         except Exception as e:
             return jsonify(format_error_response(str(e))), 500
     
     @app.route('/search/parallel', methods=['GET'])
     def search_parallel():
-        """Parallel search with threading (no cache)"""
-        query = request.args.get('q', '').strip()
-        if not query:
-            return jsonify(format_error_response('Query parameter "q" is required')), 400
-        
-        engines = request.args.get('engines', 'duckduckgo,bing').split(',')
-        max_results = min(int(request.args.get('max_results', app.config['DEFAULT_MAX_RESULTS'])), 
-                         app.config['MAX_RESULTS_LIMIT'])
+        """Parallel search on the async engine layer (no cache)"""
+        try:
+            params = read_search_args(request.args)
+        except ValueError as e:
+            return jsonify(format_error_response(str(e))), 400
         
         try:
-            response = search_service.search_parallel(query, engines, max_results)
-            return jsonify(response.to_dict()), 200
+            response = search_service.search_parallel(
+                params['query'], params['engines'], params['max_results'],
+                deadline_ms=params['deadline_ms'], hedge=params['hedge']
+            )
+            return jsonify(response.to_dict(params['fields'], params['context_budget'])), 200
         except Exception as e:
             return jsonify(format_error_response(str(e))), 500
     
     @app.route('/search', methods=['GET'])
     def search():
-        """Parallel search with threading and caching"""
-        query = request.args.get('q', '').strip()
-        if not query:
-            return jsonify(format_error_response('Query parameter "q" is required')), 400
+        """Parallel search with caching"""
+        try:
+            params = read_search_args(request.args, normalize=True)
+        except ValueError as e:
+            return jsonify(format_error_response(str(e))), 400
+        query = params['query']
         
-        engines = request.args.get('engines', 'duckduckgo,bing').split(',')
-        max_results = min(int(request.args.get('max_results', app.config['DEFAULT_MAX_RESULTS'])), 
-                         app.config['MAX_RESULTS_LIMIT'])
+        # Cache the full ranked list so any max_results can be sliced from it
+        cache_key = cache_service.get_cache_key(query, params['engines'])
         
-        cache_key = cache_service.get_cache_key(query, engines, max_results)
-        cached_response = cache_service.get(cache_key)
+        def fetch_and_cache():
+            response = search_service.search_parallel(
+                query, params['engines'], app.config['MAX_RESULTS_LIMIT'], use_cache=True,
+                deadline_ms=params['deadline_ms'], hedge=params['hedge']
+            )
+            return store_response(
+                cache_key, query, response, params['max_results'], params['fields'], params['context_budget']
+            )
         
-        if cached_response:
+        # Fresh hits are sent as stored, without decoding or encoding JSON.
+        # Each field projection has its own body, so fields=context is
+        # answered from a body holding only the context.
+        body_key = get_body_key(cache_key, params)
+        rendered = cache_service.get_body(body_key)
+        if rendered is not None:
             print(f"✅ Cache HIT for: {query}")
-            cached_response['cached'] = True
-            return jsonify(cached_response), 200
+            return send_rendered(rendered)
+        
+        entry = cache_service.lookup_entry(cache_key)
+        if entry:
+            return send_rendered(render_entry(cache_key, body_key, entry, params, request.accept_encodings))
         
         print(f"❌ Cache MISS for: {query}")
         
+        def lookup_cached():
+            cached = cache_service.get(cache_key)
+            if cached:
+                cached['cached'] = True
+            return cached
+        
         try:
-            response = search_service.search_parallel(query, engines, max_results)
-            response_dict = response.to_dict()
+            # Concurrent misses for the same key share one upstream fetch
+            response_dict = single_flight.do(cache_key, fetch_and_cache, lookup_cached)
+            return jsonify(finish_response(response_dict, params)), 200
+        except Exception as e:
+            return jsonify(format_error_response(str(e))), 500
+    
+    @app.route('/search/batch', methods=['POST'])
+    def search_batch():
+        """Run many cached searches in one request, answered in request order"""
+        body = request.get_json(silent=True) or {}
+        specs = body.get('queries')
+        if not isinstance(specs, list) or not specs:
+            return jsonify(format_error_response('Body must contain a non-empty "queries" list')), 400
+        if len(specs) > app.config['BATCH_MAX_QUERIES']:
+            return jsonify(format_error_response(
+                f"At most {app.config['BATCH_MAX_QUERIES']} queries per batch"
+            )), 400
+        
+        deadline_ms, hedge = get_latency_options(request.args)
+        started = time.perf_counter()
+        
+        # Each spec is a query string or an object of /search parameters
+        ready = {}
+        parsed = {}
+        for index, spec in enumerate(specs):
+            try:
+                parsed[index] = read_search_args(read_batch_spec(spec), normalize=True)
+            except ValueError as e:
+                ready[index] = format_error_response(str(e))
+        
+        # One MGET for every key, then one upstream fetch per distinct miss
+        cache_keys = {
+            index: cache_service.get_cache_key(params['query'], params['engines'])
+            for index, params in parsed.items()
+        }
+        misses = {}
+        for (index, cache_key), (cached_response, stale) in zip(
+            cache_keys.items(), cache_service.lookup_many(list(cache_keys.values()))
+        ):
+            params = parsed[index]
+            if not cached_response:
+                misses.setdefault(cache_key, []).append(index)
+                continue
+            if stale:
+                schedule_refresh(cache_key, params['query'], params['engines'])
+            cached_response['cached'] = True
+            cached_response['stale'] = stale
+            ready[index] = finish_response(cached_response, params)
+        
+        miss_keys = list(misses)
+        searches = [
+            (parsed[misses[cache_key][0]]['query'], parsed[misses[cache_key][0]]['engines'])
+            for cache_key in miss_keys
+        ]
+        print(f"📦 Batch of {len(specs)}: {len(miss_keys)} distinct queries to fetch")
+        
+        def resolve():
+            yield from ready.items()
+            for position, response in search_service.stream_batch(
+                searches, app.config['MAX_RESULTS_LIMIT'], use_cache=True, deadline_ms=deadline_ms, hedge=hedge
+            ):
+                cache_key = miss_keys[position]
+                first = parsed[misses[cache_key][0]]
+                response_dict = store_response(
+                    cache_key, first['query'], response,
+                    first['max_results'], first['fields'], first['context_budget']
+                )
+                for index in misses[cache_key]:
+                    yield index, finish_response(response_dict, parsed[index])
+        
+        if body.get('stream'):
+            sse = 'text/event-stream' in request.headers.get('Accept', '')
             
-            # Store in cache
-            cache_service.set(cache_key, response_dict, app.config['CACHE_DEFAULT_TIMEOUT'])
-            print(f"💾 Cached result for: {query}")
+            def generate():
+                # Headers are already sent, so failures end the stream with an event
+                try:
+                    for index, response_dict in resolve():
+                        yield format_stream_event('result', {'index': index, **response_dict}, sse)
+                except Exception as e:
+                    yield format_stream_event('error', format_error_response(str(e)), sse)
+                    return
+                yield format_stream_event('done', {
+                    'count': len(specs),
+                    'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+                }, sse)
             
-            return jsonify(response_dict), 200
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream' if sse else 'application/x-ndjson',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+        
+        try:
+            results = [None] * len(specs)
+            for index, response_dict in resolve():
+                results[index] = response_dict
+            return jsonify({
+                'success': True,
+                'count': len(results),
+                'results': results,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+            }), 200
         except Exception as e:
             return jsonify(format_error_response(str(e))), 500
     
+    @app.route('/search/stream', methods=['GET'])
+    def search_stream():
+        """Stream each engine's results as they arrive, then the ranked context"""
+        try:
+            params = read_search_args(request.args, normalize=True)
+        except ValueError as e:
+            return jsonify(format_error_response(str(e))), 400
+        query, engines, max_results = params['query'], params['engines'], params['max_results']
+        deadline_ms, hedge, context_budget = params['deadline_ms'], params['hedge'], params['context_budget']
+        sse = 'text/event-stream' in request.headers.get('Accept', '')
+        
+        def generate():
+            started = time.perf_counter()
+            first_result_ms = None
+            outcomes = []
+            
+            # Headers are already sent, so failures end the stream with an event,
+            # which the extension can tell apart from a slow engine
+            try:
+                for outcome in search_service.stream_engine_results(
+                    query, engines, max_results, use_cache=True, deadline_ms=deadline_ms, hedge=hedge
+                ):
+                    if first_result_ms is None and outcome.results:
+                        first_result_ms = (time.perf_counter() - started) * 1000
+                        metrics.FIRST_RESULT_DURATION.observe(first_result_ms / 1000)
+                    outcomes.append(outcome)
+                    yield format_stream_event('engine', outcome.to_dict(), sse)
+                
+                outcomes.sort(key=lambda outcome: engines.index(outcome.engine))
+                response_dict = search_service.build_response(query, outcomes, max_results).to_dict(
+                    context_budget=context_budget
+                )
+                response_dict['time_to_first_result_ms'] = round(first_result_ms, 1) if first_result_ms is not None else None
+                response_dict['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                yield format_stream_event('context', response_dict, sse)
+            except Exception as e:
+                yield format_stream_event('error', format_error_response(str(e)), sse)
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream' if sse else 'application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
     @app.route('/cache/clear', methods=['POST'])
     def clear_cache():
         """Clear all cached search results"""
@@ -119,8 +561,10 @@ def create_app(config_name: str = None):
         return jsonify({
             'cache_type': app.config['CACHE_TYPE'],
             'timeout': app.config['CACHE_DEFAULT_TIMEOUT'],
+            'hard_timeout': app.config['CACHE_HARD_TIMEOUT'],
             'redis_host': app.config.get('CACHE_REDIS_HOST'),
-            'redis_port': app.config.get('CACHE_REDIS_PORT')
+            'redis_port': app.config.get('CACHE_REDIS_PORT'),
+            'tiers': cache_service.get_stats()
         })
     
     @app.route('/cache/test', methods=['GET'])
@@ -131,6 +575,11 @@ def create_app(config_name: str = None):
             return jsonify(result), 500
         return jsonify(result)
     
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        """Expose metrics in the Prometheus text format"""
+        return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+    
     @app.route('/health', methods=['GET'])
     def health_check():
         """Health check endpoint"""
@@ -139,15 +588,48 @@ def create_app(config_name: str = None):
             'timestamp': time.time()
         })
     
+    @app.route('/ready', methods=['GET'])
+    def readiness_check():
+        """Readiness probe: the cache answers and at least one engine can serve"""
+        cache_status = cache_service.ping()
+        engine_status = search_service.load_engines()
+        ready = cache_status['ok'] and any(
+            status['loaded'] and status['breaker'] != 'open' for status in engine_status.values()
+        )
+        return jsonify({
+            'ready': ready,
+            'cache': cache_status,
+            'engines': engine_status,
+            'timestamp': time.time()
+        }), 200 if ready else 503
+    
     @app.route('/engines', methods=['GET'])
     def list_engines():
         """List available search engines"""
         engines = search_service.get_available_engines()
         return jsonify({
             'engines': engines,
-            'default': ','.join(engines)
+            'default': ','.join(engines),
+            'connections': search_service.get_connection_stats(),
+            'parse': search_service.get_parse_stats(),
+            'latency': search_service.get_latency_stats(),
+            'breakers': search_service.get_breaker_stats(),
+            'scheduler': search_service.get_scheduler_stats()
         })
     
+    # Shared with the ASGI entry point, which serves the search routes
+    # asynchronously on top of the same services
+    app.extensions['polypop'] = {
+        'search_service': search_service,
+        'cache_service': cache_service,
+        'single_flight': single_flight,
+        'read_search_args': read_search_args,
+        'finish_response': finish_response,
+        'get_body_key': get_body_key,
+        'render_entry': render_entry,
+        'store_response': store_response
+    }
+    
     return app
 
 if __name__ == '__main__':
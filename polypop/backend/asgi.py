@@ -0,0 +1,249 @@
+"""
+ASGI entry point
+
+Serves /search, /search/parallel and /search/sequential as coroutines, so
+a request waiting on the engines holds no thread, and cache reads go
+through a pooled non-blocking Redis client. Parameter validation and
+response shaping come from create_app, and every other route is the
+Flask app itself, mounted with a2wsgi on a small thread pool, so the two
+entry points share one set of services and behave the same.
+
+Run with any ASGI server, e.g.:
+    uvicorn asgi:create_asgi_app --factory --port 5000
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Tuple
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from flask_cors.core import get_cors_headers, get_cors_options
+from werkzeug.datastructures import ETags, Headers
+from werkzeug.http import parse_accept_header, parse_etags
+
+from app import create_app
+from utils import metrics
+from utils.formatters import format_error_response
+from utils.response_body import rendered_response
+
+# (status, headers, body) of a response from an async route
+AsgiResponse = Tuple[int, Dict[str, str], bytes]
+
+
+class AsgiRequest:
+    """The parts of an HTTP request the async routes read"""
+    
+    def __init__(self, scope: dict):
+        self.path = scope['path']
+        self.method = scope['method']
+        self.args: Dict[str, str] = {}
+        for key, value in parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True):
+            # First value wins, as with Flask's request.args.get
+            self.args.setdefault(key, value)
+        self.headers = Headers()
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1')
+            value = value.decode('latin-1')
+            previous = self.headers.get(name)
+            self.headers[name] = f"{previous}, {value}" if previous is not None else value
+    
+    @property
+    def accept_encodings(self):
+        return parse_accept_header(self.headers.get('Accept-Encoding'))
+    
+    @property
+    def if_none_match(self) -> ETags:
+        return parse_etags(self.headers.get('If-None-Match'))
+
+
+def create_asgi_app(config_name: str = None, config_overrides: dict = None):
+    """
+    Build the ASGI application
+    
+    Args:
+        config_name: Config name, as for create_app
+        config_overrides: Config values to override, as for create_app
+    
+    Returns:
+        ASGI application callable
+    """
+    flask_app = create_app(config_name, config_overrides)
+    config = flask_app.config
+    services = flask_app.extensions['polypop']
+    search_service = services['search_service']
+    cache_service = services['cache_service']
+    single_flight = services['single_flight']
+    read_search_args = services['read_search_args']
+    finish_response = services['finish_response']
+    get_body_key = services['get_body_key']
+    render_entry = services['render_entry']
+    store_response = services['store_response']
+    
+    wsgi_app = WSGIMiddleware(flask_app, workers=config['ASGI_WSGI_THREADS'])
+    
+    # create_app's CORS(app) takes its options from the same config
+    cors_options = get_cors_options(flask_app)
+    
+    def json_response(data: dict, status: int = 200) -> AsgiResponse:
+        """Serialize like Flask's jsonify"""
+        body = (flask_app.json.dumps(data) + '\n').encode('utf-8')
+        return status, {'Content-Type': 'application/json'}, body
+    
+    async def search_sequential(request: AsgiRequest) -> AsgiResponse:
+        """Sequential search, one engine at a time"""
+        try:
+            params = read_search_args(request.args)
+        except ValueError as e:
+            return json_response(format_error_response(str(e)), 400)
+        
+        try:
+            response = await search_service.await_async(search_service.search_sequential_async(
+                params['query'], params['engines'], params['max_results']
+            ))
+            return json_response(response.to_dict(params['fields'], params['context_budget']))
+        except Exception as e:
+            return json_response(format_error_response(str(e)), 500)
+    
+    async def search_parallel(request: AsgiRequest) -> AsgiResponse:
+        """Parallel search on the async engine layer (no cache)"""
+        try:
+            params = read_search_args(request.args)
+        except ValueError as e:
+            return json_response(format_error_response(str(e)), 400)
+        
+        try:
+            response = await search_service.await_async(search_service.search_async(
+                params['query'], params['engines'], params['max_results'],
+                deadline_ms=params['deadline_ms'], hedge=params['hedge']
+            ))
+            return json_response(response.to_dict(params['fields'], params['context_budget']))
+        except Exception as e:
+            return json_response(format_error_response(str(e)), 500)
+    
+    async def search(request: AsgiRequest) -> AsgiResponse:
+        """Parallel search with caching, as the Flask route with non-blocking cache reads"""
+        try:
+            params = read_search_args(request.args, normalize=True)
+        except ValueError as e:
+            return json_response(format_error_response(str(e)), 400)
+        query = params['query']
+        cache_key = cache_service.get_cache_key(query, params['engines'])
+        
+        # Fresh hits are sent as stored, without decoding or encoding JSON
+        body_key = get_body_key(cache_key, params)
+        rendered = await cache_service.get_body_async(body_key)
+        if rendered is not None:
+            print(f"✅ Cache HIT for: {query}")
+            return rendered_response(rendered, request.accept_encodings, request.if_none_match)
+        
+        entry = await cache_service.lookup_entry_async(cache_key)
+        if entry:
+            # Compression and the body write run off the event loop
+            rendered = await asyncio.to_thread(
+                render_entry, cache_key, body_key, entry, params, request.accept_encodings
+            )
+            return rendered_response(rendered, request.accept_encodings, request.if_none_match)
+        
+        print(f"❌ Cache MISS for: {query}")
+        
+        async def fetch_and_cache():
+            response = await search_service.await_async(search_service.search_async(
+                query, params['engines'], config['MAX_RESULTS_LIMIT'], use_cache=True,
+                deadline_ms=params['deadline_ms'], hedge=params['hedge']
+            ))
+            return await asyncio.to_thread(
+                store_response, cache_key, query, response,
+                params['max_results'], params['fields'], params['context_budget']
+            )
+        
+        async def lookup_cached():
+            cached = await cache_service.lookup_entry_async(cache_key)
+            if cached:
+                cached['value']['cached'] = True
+                return cached['value']
+            return None
+        
+        try:
+            # Concurrent misses for the same key share one upstream fetch
+            response_dict = await single_flight.do_async(cache_key, fetch_and_cache, lookup_cached)
+            return json_response(finish_response(response_dict, params))
+        except Exception as e:
+            return json_response(format_error_response(str(e)), 500)
+    
+    routes: Dict[str, Callable[[AsgiRequest], Awaitable[AsgiResponse]]] = {
+        '/search': search,
+        '/search/parallel': search_parallel,
+        '/search/sequential': search_sequential
+    }
+    
+    def open_async_redis():
+        """Create the pooled async Redis client on the running event loop"""
+        if cache_service.async_redis is not None or config['CACHE_TYPE'] != 'RedisCache':
+            return
+        import redis.asyncio
+        
+        client = redis.asyncio.Redis(connection_pool=redis.asyncio.ConnectionPool.from_url(
+            config['CACHE_REDIS_URL'],
+            max_connections=config['ASYNC_REDIS_MAX_CONNECTIONS']
+        ))
+        cache_service.async_redis = client
+        single_flight.async_redis = client
+    
+    async def close_async_redis():
+        client = cache_service.async_redis
+        cache_service.async_redis = None
+        single_flight.async_redis = None
+        if client is not None:
+            await client.aclose()
+    
+    async def lifespan(receive: Callable, send: Callable):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                open_async_redis()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_async_redis()
+                await search_service.await_async(search_service.aclose())
+                wsgi_app.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def application(scope: dict, receive: Callable, send: Callable):
+        if scope['type'] == 'lifespan':
+            await lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        
+        route = routes.get(scope['path']) if scope['method'] in ('GET', 'HEAD') else None
+        if route is None:
+            await wsgi_app(scope, receive, send)
+            return
+        
+        # Servers without lifespan support get the client on first use
+        open_async_redis()
+        started = time.perf_counter()
+        request = AsgiRequest(scope)
+        try:
+            status, headers, body = await route(request)
+        except Exception as e:
+            status, headers, body = json_response(format_error_response(str(e)), 500)
+        metrics.REQUEST_DURATION.labels(scope['path'], scope['method'], status).observe(
+            time.perf_counter() - started
+        )
+        
+        headers['Content-Length'] = str(len(body))
+        # The same CORS headers as the Flask app sends
+        cors_headers = get_cors_headers(cors_options, request.headers, request.method)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in [*headers.items(), *cors_headers.items(multi=True)]
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+    
+    return application
\ No newline at end of file
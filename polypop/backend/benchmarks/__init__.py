@@ -0,0 +1,6 @@
+"""
+Offline benchmark suite for the search backend
+
+Runs against recorded engine fixtures served by a local stub server, so
+results are reproducible and never touch live Bing or DuckDuckGo.
+"""
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+Flask-Caching backend that runs RedisCache on an in-memory fake Redis
+
+Set CACHE_TYPE = 'benchmarks.fake_redis.fake_redis_cache' to exercise
+the Redis code paths (pickling, pub/sub, leases) without a server.
+Requires the optional fakeredis package.
+"""
+from flask_caching.backends.rediscache import RedisCache
+
+
+def fake_redis_cache(app, config, args, kwargs):
+    try:
+        import fakeredis
+    except ImportError as e:
+        raise RuntimeError("fakeredis is required for the fake Redis cache: pip install fakeredis") from e
+    
+    kwargs.update(
+        host=fakeredis.FakeStrictRedis(),
+        key_prefix=config.get('CACHE_KEY_PREFIX')
+    )
+    kwargs.pop('ignore_delete_many_errors', None)
+    return RedisCache(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,590 @@
+"""
+Benchmark runner
+
+Usage (from the backend directory):
+    python -m benchmarks.runner --requests 200 --concurrency 16
+    python -m benchmarks.runner --only ranking,parsers --baseline results/old.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import pickle
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from benchmarks.stub_server import FIXTURES_DIR, ROUTES
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+ROUTE_MODES = {
+    'sequential': '/search/sequential',
+    'parallel': '/search/parallel',
+    'cached': '/search'
+}
+
+CACHE_TYPES = {
+    'simple': 'SimpleCache',
+    'fakeredis': 'benchmarks.fake_redis.fake_redis_cache'
+}
+
+SECTIONS = ('routes', 'ranking', 'parsers', 'payload', 'startup', 'capacity')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples_ms: List[float]) -> dict:
+    """Latency summary in milliseconds"""
+    return {
+        'p50': round(percentile(samples_ms, 50), 3),
+        'p95': round(percentile(samples_ms, 95), 3),
+        'p99': round(percentile(samples_ms, 99), 3),
+        'mean': round(sum(samples_ms) / len(samples_ms), 3) if samples_ms else 0.0,
+        'max': round(max(samples_ms), 3) if samples_ms else 0.0
+    }
+
+
+def time_calls(fn: Callable[[], object], iterations: int) -> dict:
+    """Time repeated calls of fn and summarize per-call latency"""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def make_queries(count: int, seed: int) -> List[str]:
+    """Distinct Polymarket-style event titles"""
+    rng = random.Random(seed)
+    subjects = ['Trump', 'Bitcoin', 'Fed rates', 'Ethereum ETF', 'Newsom', 'Vance', 'Tesla', 'OpenAI']
+    events = ['win 2028', 'hit 100k', 'cut in June', 'approved by July', 'run for president', 'IPO this year']
+    return [f"Will {rng.choice(subjects)} {rng.choice(events)} #{i}" for i in range(count)]
+
+
+def start_stub_server(args) -> tuple:
+    """Start the stub server in a child process so its CPU is not counted"""
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'benchmarks.stub_server',
+            '--port', '0',
+            '--latency-ms', str(args.latency_ms),
+            '--jitter-ms', str(args.jitter_ms),
+            '--error-rate', str(args.error_rate),
+            '--seed', str(args.seed)
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    line = process.stdout.readline().strip()
+    if not line.startswith('listening on '):
+        process.kill()
+        raise RuntimeError(f"Stub server failed to start: {line!r}")
+    base_url = line[len('listening on '):]
+    engine_urls = {engine: base_url + path for path, (engine, _) in ROUTES.items()}
+    return process, engine_urls
+
+
+# Run in a fresh interpreter: import the app, build it, serve one search
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app('testing', json.loads(sys.argv[1]))
+created = time.perf_counter()
+response = app.test_client().get('/search', query_string={'q': 'Will Trump win the 2028 election?'})
+answered = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (answered - created) * 1000,
+    'status': response.status_code
+}))
+"""
+
+
+def benchmark_config(args, engine_urls: dict) -> dict:
+    """Config overrides pointing the backend at the stub server"""
+    # The stub server is not rate limited, so neither are the engines
+    return {
+        'CACHE_TYPE': CACHE_TYPES[args.cache],
+        'ENGINE_URLS': engine_urls,
+        'ENGINE_RATE_LIMITS': {},
+        'ENGINE_RATE_DEFAULT': 10000.0,
+        'ENGINE_RATE_BURST': 10000
+    }
+
+
+def create_benchmark_app(args, engine_urls: dict):
+    """Build the backend app against the stub server"""
+    from app import create_app
+    
+    return create_app('testing', benchmark_config(args, engine_urls))
+
+
+def bench_routes(args) -> dict:
+    """Load-test the sequential, parallel and cached search routes"""
+    process, engine_urls = start_stub_server(args)
+    try:
+        app = create_benchmark_app(args, engine_urls)
+        queries = make_queries(args.unique_queries, args.seed)
+        # Skewed popularity, like real event pages: a few hot queries
+        weights = [1 / (rank + 1) for rank in range(len(queries))]
+        
+        results = {}
+        for mode in args.modes:
+            route = ROUTE_MODES[mode]
+            client = app.test_client()
+            client.post('/cache/clear')
+            
+            rng = random.Random(args.seed)
+            plan = rng.choices(queries, weights=weights, k=args.requests)
+            for query in plan[:args.warmup]:
+                client.get(route, query_string={'q': query})
+            
+            def run(query: str) -> tuple:
+                started = time.perf_counter()
+                response = app.test_client().get(route, query_string={'q': query})
+                elapsed = (time.perf_counter() - started) * 1000
+                body = response.get_json(silent=True) or {}
+                return elapsed, response.status_code, body.get('cached', False)
+            
+            cpu_started = time.process_time()
+            wall_started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                outcomes = list(executor.map(run, plan))
+            wall = time.perf_counter() - wall_started
+            cpu = time.process_time() - cpu_started
+            
+            latencies = [elapsed for elapsed, _, _ in outcomes]
+            results[mode] = {
+                'route': route,
+                'requests': len(outcomes),
+                'errors': sum(1 for _, status, _ in outcomes if status >= 400),
+                'cache_hit_ratio': round(sum(1 for _, _, cached in outcomes if cached) / len(outcomes), 3),
+                'latency_ms': summarize(latencies),
+                'throughput_rps': round(len(outcomes) / wall, 2),
+                'cpu_ms_per_request': round(cpu * 1000 / len(outcomes), 3)
+            }
+            print_route(mode, results[mode])
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def load_fixture_results() -> Dict[str, list]:
+    """Parse every fixture once with the default parser"""
+    from engines.bing import BingEngine
+    from engines.duckduckgo import DuckDuckGoEngine
+    
+    parsed = {}
+    for engine in (DuckDuckGoEngine(), BingEngine()):
+        with open(os.path.join(FIXTURES_DIR, f"{engine.name}.html"), encoding='utf-8') as f:
+            parsed[engine.name] = engine.parse_results(f.read(), 50)
+    return parsed
+
+
+def make_candidates(count: int, seed: int = 42) -> list:
+    """
+    Distinct candidates built from fixture vocabulary
+    
+    Each candidate gets its own URL and text drawn at random from the
+    fixture words, so none are deduplicated away before ranking.
+    """
+    from models.search_result import SearchResult
+    from utils.normalize import tokenize
+    
+    base = [r for results in load_fixture_results().values() for r in results]
+    words = sorted({word for r in base for word in tokenize(f"{r.title} {r.snippet}")})
+    rng = random.Random(seed)
+    return [
+        SearchResult(
+            title=' '.join(rng.choices(words, k=8)),
+            snippet=' '.join(rng.choices(words, k=30)),
+            url=f"https://example.com/{i}",
+            source=base[i % len(base)].source
+        )
+        for i in range(count)
+    ]
+
+
+def bench_ranking(args) -> dict:
+    """Microbenchmark merge_and_rank_results with every ranker over fixture candidates"""
+    from utils.ranking import RANKERS, merge_and_rank_results
+    
+    query = 'Will Trump win the 2028 presidential election?'
+    results = {}
+    for ranker in RANKERS:
+        results[ranker] = {}
+        for count in args.candidates:
+            candidates = make_candidates(count, args.seed)
+            results[ranker][str(count)] = time_calls(
+                lambda: merge_and_rank_results(candidates, query, 10, ranker),
+                args.iterations
+            )
+            print(f"  {ranker:<15} {count:>4} candidates: p50 {results[ranker][str(count)]['p50']:.3f} ms")
+    return results
+
+
+def bench_parsers(args) -> dict:
+    """Microbenchmark every parser backend on every engine fixture"""
+    from engines.bing import BingEngine
+    from engines.duckduckgo import DuckDuckGoEngine
+    from engines.parsers import PARSER_BACKENDS
+    
+    results = {}
+    for engine_class in (DuckDuckGoEngine, BingEngine):
+        for backend in PARSER_BACKENDS:
+            engine = engine_class(parser=backend)
+            with open(os.path.join(FIXTURES_DIR, f"{engine.name}.html"), encoding='utf-8') as f:
+                html = f.read()
+            
+            name = f"{engine.name}.{backend}"
+            results[name] = time_calls(lambda: engine.parse_results(html, 10), args.iterations)
+            print(f"  parse {name:<24} p50 {results[name]['p50']:.3f} ms")
+    return results
+
+
+def bench_payload(args) -> dict:
+    """Compare stored size and encode/decode time of legacy and compact cache entries"""
+    from services.cache_codec import CacheCodec, zstandard
+    from utils.formatters import format_search_response
+    from utils.ranking import merge_and_rank_results
+    
+    candidates = [r for results in load_fixture_results().values() for r in results]
+    query = 'Will Trump win the 2028 presidential election?'
+    response = format_search_response(query, merge_and_rank_results(candidates, query, 50)).to_dict()
+    now = time.time()
+    entry = {'value': response, 'fresh_until': now + 300, 'expires_at': now + 3600}
+    
+    # flask_caching's RedisCache pickles values with the default protocol
+    legacy = pickle.dumps(entry)
+    results = {
+        'legacy': {
+            'bytes': len(legacy),
+            'encode_ms': time_calls(lambda: pickle.dumps(entry), args.iterations),
+            'decode_ms': time_calls(lambda: pickle.loads(legacy), args.iterations)
+        }
+    }
+    
+    compressions = ['none', 'zlib'] + (['zstd'] if zstandard is not None else [])
+    for compression in compressions:
+        codec = CacheCodec(compression=compression, threshold=0)
+        # Compact entries are bytes, which RedisCache also pickles
+        stored = pickle.dumps(codec.encode(entry))
+        results[f"compact.{compression}"] = {
+            'bytes': len(stored),
+            'encode_ms': time_calls(lambda: pickle.dumps(codec.encode(entry)), args.iterations),
+            'decode_ms': time_calls(lambda: codec.decode(pickle.loads(stored)), args.iterations)
+        }
+    
+    for name, result in results.items():
+        print(
+            f"  {name:<14} {result['bytes']:>7} bytes ({result['bytes'] / len(legacy):>4.0%})  "
+            f"encode p50 {result['encode_ms']['p50']:.3f} ms  decode p50 {result['decode_ms']['p50']:.3f} ms"
+        )
+    if zstandard is None:
+        print("  compact.zstd   skipped: zstandard is not installed")
+    return results
+
+
+def bench_startup(args) -> dict:
+    """Time import, create_app and the first /search in fresh interpreters"""
+    process, engine_urls = start_stub_server(args)
+    try:
+        samples = {
+            key: []
+            for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'import_to_first_response_ms', 'process_ms')
+        }
+        for _ in range(args.startup_runs):
+            launched = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT, json.dumps(benchmark_config(args, engine_urls))],
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            samples['process_ms'].append((time.perf_counter() - launched) * 1000)
+            
+            # The app logs to stdout too; the timings are the last line
+            timings = json.loads(completed.stdout.strip().splitlines()[-1])
+            if timings['status'] != 200:
+                raise RuntimeError(f"First request failed with {timings['status']}")
+            for key in ('import_ms', 'create_app_ms', 'first_request_ms'):
+                samples[key].append(timings[key])
+            samples['import_to_first_response_ms'].append(
+                timings['import_ms'] + timings['create_app_ms'] + timings['first_request_ms']
+            )
+        
+        results = {key: summarize(values) for key, values in samples.items()}
+        for key, summary in results.items():
+            print(f"  {key:<28} p50 {summary['p50']:>8.1f} ms  max {summary['max']:>8.1f} ms")
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def call_asgi(application, path: str, query: dict) -> tuple:
+    """
+    Send one GET request to an ASGI app in-process
+    
+    Returns:
+        Coroutine resolving to (status code, JSON body or None)
+    """
+    from urllib.parse import urlencode
+    
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': urlencode(query).encode('latin-1'),
+        'headers': [],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0)
+    }
+    sent = {'status': 500, 'body': bytearray()}
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            sent['status'] = message['status']
+        else:
+            sent['body'].extend(message.get('body', b''))
+    
+    async def run():
+        await application(scope, receive, send)
+        try:
+            body = json.loads(sent['body'])
+        except ValueError:
+            body = None
+        return sent['status'], body
+    
+    return run()
+
+
+def bench_capacity(args) -> dict:
+    """
+    Concurrent requests one process can carry on /search/parallel, WSGI vs ASGI
+    
+    WSGI gets a fixed pool of --wsgi-threads request threads, as a threaded
+    worker would, so requests beyond it queue; latency counts from arrival.
+    ASGI serves every in-flight request as a coroutine on one event loop.
+    """
+    from asgi import create_asgi_app
+    
+    process, engine_urls = start_stub_server(args)
+    try:
+        overrides = dict(
+            benchmark_config(args, engine_urls),
+            UPSTREAM_MAX_CONCURRENCY=max(args.capacity_concurrency) * 2,
+            HTTP_POOL_SIZE=max(args.capacity_concurrency) * 2
+        )
+        from app import create_app
+        
+        app = create_app('testing', overrides)
+        asgi_app = create_asgi_app('testing', overrides)
+        queries = make_queries(args.unique_queries, args.seed)
+        route = ROUTE_MODES['parallel']
+        
+        def record(mode: str, concurrency: int, outcomes: list, wall: float, cpu: float, threads: int) -> dict:
+            latencies = [elapsed for elapsed, _ in outcomes]
+            result = {
+                'requests': len(outcomes),
+                'errors': sum(1 for _, status in outcomes if status >= 400),
+                'latency_ms': summarize(latencies),
+                'throughput_rps': round(len(outcomes) / wall, 2),
+                'cpu_ms_per_request': round(cpu * 1000 / len(outcomes), 3),
+                'peak_threads': threads
+            }
+            latency = result['latency_ms']
+            print(
+                f"  {mode:<5} c={concurrency:<5} p50 {latency['p50']:>8.1f} ms  p99 {latency['p99']:>8.1f} ms  "
+                f"{result['throughput_rps']:>7.1f} req/s  {result['cpu_ms_per_request']:>6.2f} cpu ms/req  "
+                f"{threads} threads  {result['errors']} errors"
+            )
+            return result
+        
+        def run_wsgi(concurrency: int) -> dict:
+            plan = [queries[i % len(queries)] for i in range(concurrency)]
+            client = app.test_client()
+            
+            def run(query: str, arrived: float) -> tuple:
+                response = client.get(route, query_string={'q': query})
+                return (time.perf_counter() - arrived) * 1000, response.status_code
+            
+            cpu_started = time.process_time()
+            wall_started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.wsgi_threads) as executor:
+                futures = [executor.submit(run, query, time.perf_counter()) for query in plan]
+                threads = threading.active_count()
+                outcomes = [future.result() for future in futures]
+            return record('wsgi', concurrency, outcomes, time.perf_counter() - wall_started,
+                          time.process_time() - cpu_started, threads)
+        
+        async def run_asgi(concurrency: int) -> dict:
+            plan = [queries[i % len(queries)] for i in range(concurrency)]
+            
+            async def run(query: str) -> tuple:
+                arrived = time.perf_counter()
+                status, _ = await call_asgi(asgi_app, route, {'q': query})
+                return (time.perf_counter() - arrived) * 1000, status
+            
+            cpu_started = time.process_time()
+            wall_started = time.perf_counter()
+            tasks = [asyncio.ensure_future(run(query)) for query in plan]
+            await asyncio.sleep(0)
+            threads = threading.active_count()
+            outcomes = await asyncio.gather(*tasks)
+            return record('asgi', concurrency, outcomes, time.perf_counter() - wall_started,
+                          time.process_time() - cpu_started, threads)
+        
+        # One untimed request each, so engine loading is not measured
+        app.test_client().get(route, query_string={'q': queries[0]})
+        asyncio.run(call_asgi(asgi_app, route, {'q': queries[0]}))
+        
+        results = {'wsgi_threads': args.wsgi_threads}
+        for concurrency in args.capacity_concurrency:
+            results[f"c{concurrency}"] = {
+                'wsgi': run_wsgi(concurrency),
+                'asgi': asyncio.run(run_asgi(concurrency))
+            }
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def print_route(mode: str, result: dict):
+    latency = result['latency_ms']
+    print(
+        f"  {mode:<10} {result['route']:<18} "
+        f"p50 {latency['p50']:>8.1f} ms  p95 {latency['p95']:>8.1f} ms  p99 {latency['p99']:>8.1f} ms  "
+        f"{result['throughput_rps']:>7.1f} req/s  {result['cpu_ms_per_request']:>6.2f} cpu ms/req  "
+        f"hit {result['cache_hit_ratio']:.2f}"
+    )
+
+
+def flatten(data: dict, prefix: str = '') -> Dict[str, float]:
+    """Flatten nested results to dotted paths of numeric leaves"""
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict):
+    """Print relative change of every metric present in both runs"""
+    before = flatten({section: baseline.get(section, {}) for section in SECTIONS})
+    after = flatten({section: current.get(section, {}) for section in SECTIONS})
+    print('\nChange vs baseline:')
+    for path in sorted(set(before) & set(after)):
+        if before[path]:
+            change = (after[path] - before[path]) / before[path] * 100
+            print(f"  {path:<55} {before[path]:>10.3f} -> {after[path]:>10.3f}  ({change:+.1f}%)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Offline search backend benchmarks')
+    parser.add_argument('--only', default=','.join(SECTIONS),
+                        help=f"comma-separated sections: {', '.join(SECTIONS)}")
+    parser.add_argument('--modes', default=','.join(ROUTE_MODES),
+                        help=f"comma-separated route modes: {', '.join(ROUTE_MODES)}")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--unique-queries', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=120)
+    parser.add_argument('--jitter-ms', type=float, default=40)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--cache', choices=sorted(CACHE_TYPES), default='simple')
+    parser.add_argument('--iterations', type=int, default=200, help='microbenchmark iterations')
+    parser.add_argument('--candidates', default='20,100,500', help='ranking candidate counts')
+    parser.add_argument('--startup-runs', type=int, default=5, help='fresh interpreters for the startup section')
+    parser.add_argument('--capacity-concurrency', default='16,64,256',
+                        help='concurrent requests for the capacity section')
+    parser.add_argument('--wsgi-threads', type=int, default=16, help='WSGI request threads for the capacity section')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON results path (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', help='previous JSON results to compare against')
+    args = parser.parse_args(argv)
+    
+    args.only = [s for s in args.only.split(',') if s]
+    args.modes = [m for m in args.modes.split(',') if m]
+    args.candidates = [int(c) for c in args.candidates.split(',') if c]
+    args.capacity_concurrency = [int(c) for c in args.capacity_concurrency.split(',') if c]
+    for section in args.only:
+        if section not in SECTIONS:
+            parser.error(f"unknown section: {section}")
+    for mode in args.modes:
+        if mode not in ROUTE_MODES:
+            parser.error(f"unknown mode: {mode}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    benches = {
+        'routes': bench_routes,
+        'ranking': bench_ranking,
+        'parsers': bench_parsers,
+        'payload': bench_payload,
+        'startup': bench_startup,
+        'capacity': bench_capacity
+    }
+    
+    results = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')}
+        }
+    }
+    for section in args.only:
+        print(f"{section}:")
+        results[section] = benches[section](args)
+    
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\nResults written to {output}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Local stub HTTP server that serves recorded engine result pages
+"""
+import argparse
+import gzip
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Request path -> (engine name, fixture file); paths mirror the live endpoints
+ROUTES = {
+    '/html/': ('duckduckgo', 'duckduckgo.html'),
+    '/search': ('bing', 'bing.html')
+}
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under load-test bursts
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class StubEngineServer:
+    """Threaded HTTP server with configurable latency, jitter and errors"""
+    
+    def __init__(
+        self,
+        port: int = 0,
+        latency_ms: float = 100,
+        jitter_ms: float = 20,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pages = {}
+        for path, (_, filename) in ROUTES.items():
+            with open(os.path.join(FIXTURES_DIR, filename), 'rb') as f:
+                body = f.read()
+            self._pages[path] = (body, gzip.compress(body))
+        
+        self._server = _Server(('127.0.0.1', port), self._make_handler())
+        self._thread = None
+    
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+    
+    def engine_urls(self) -> dict:
+        """
+        Get ENGINE_URLS config pointing every engine at this server
+        
+        Returns:
+            Dict mapping engine name to stub URL
+        """
+        return {
+            engine: f"http://127.0.0.1:{self.port}{path}"
+            for path, (engine, _) in ROUTES.items()
+        }
+    
+    def start(self) -> 'StubEngineServer':
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def serve_forever(self):
+        """Serve requests on the calling thread"""
+        self._server.serve_forever()
+    
+    def stop(self):
+        """Stop serving and close the socket"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def _next_delay(self) -> tuple:
+        """Draw this request's delay in seconds and whether it fails"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            failed = self._random.random() < self.error_rate
+        return max(delay, 0) / 1000, failed
+    
+    def _make_handler(self):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_GET(self):
+                delay, failed = stub._next_delay()
+                time.sleep(delay)
+                
+                page = stub._pages.get(self.path.split('?', 1)[0])
+                if page is None or failed:
+                    self.send_response(404 if page is None else 503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                
+                body, compressed = page
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = compressed
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded engine fixtures')
+    parser.add_argument('--port', type=int, default=8765, help='0 picks a free port')
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    
+    server = StubEngineServer(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    # The runner reads this line to find the port
+    print(f"listening on http://127.0.0.1:{server.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
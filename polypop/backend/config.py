@@ -1,4 +1,6 @@
+import hashlib
 import os
+import tempfile
 
 
 class Config:
@@ -14,6 +16,55 @@ class Config:
     CACHE_REDIS_DB = int(os.getenv('REDIS_DB', 0))
     CACHE_REDIS_URL = f"redis://{CACHE_REDIS_HOST}:{CACHE_REDIS_PORT}/{CACHE_REDIS_DB}"
     CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', 300))
+    CACHE_HARD_TIMEOUT = int(os.getenv('CACHE_HARD_TIMEOUT', 3600))
+    
+    # In-process L1 cache in front of Redis
+    CACHE_L1_MAX_ENTRIES = int(os.getenv('CACHE_L1_MAX_ENTRIES', 1024))
+    CACHE_L1_MAX_BYTES = int(os.getenv('CACHE_L1_MAX_BYTES', 64 * 1024 * 1024))
+    CACHE_L1_TIMEOUT = int(os.getenv('CACHE_L1_TIMEOUT', 60))
+    CACHE_INVALIDATION_CHANNEL = 'polypop:cache-invalidate'
+    
+    # Shared-memory tier between L1 and Redis, one file mapped by every
+    # worker on the host. Entries bigger than a slot go to Redis only; if
+    # the file cannot be mapped the tier is skipped. The default file is
+    # named after the Redis URL, so only workers of one deployment share it.
+    CACHE_SHM_ENABLED = os.getenv('CACHE_SHM_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    CACHE_SHM_PATH = os.getenv(
+        'CACHE_SHM_PATH',
+        os.path.join(
+            '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+            f"polypop-cache-{hashlib.sha1(CACHE_REDIS_URL.encode('utf-8')).hexdigest()[:12]}"
+        )
+    )
+    CACHE_SHM_SLOTS = int(os.getenv('CACHE_SHM_SLOTS', 2048))
+    CACHE_SHM_SLOT_BYTES = int(os.getenv('CACHE_SHM_SLOT_BYTES', 16384))
+    
+    # Redis payloads: 'compact' (versioned binary, results only) or 'legacy'
+    # (pickled response dicts). Both are always readable, so switch writers
+    # to 'compact' once every worker runs a version that can read it.
+    CACHE_PAYLOAD_FORMAT = os.getenv('CACHE_PAYLOAD_FORMAT', 'legacy')
+    
+    # Compact payloads larger than the threshold (bytes) are compressed
+    # with 'zlib', 'zstd' (needs the zstandard package) or 'none'
+    CACHE_COMPRESSION = os.getenv('CACHE_COMPRESSION', 'zlib')
+    CACHE_COMPRESSION_THRESHOLD = int(os.getenv('CACHE_COMPRESSION_THRESHOLD', 1024))
+    CACHE_COMPRESSION_LEVEL = 3
+    
+    # Cache hits are sent as JSON bodies rendered and compressed once
+    RESPONSE_GZIP_LEVEL = 6
+    RESPONSE_BROTLI_QUALITY = 9
+    
+    # ASGI mode (asgi.py): async Redis pool for cache reads, and threads for
+    # the routes that are still served by the WSGI app
+    ASYNC_REDIS_MAX_CONNECTIONS = int(os.getenv('ASYNC_REDIS_MAX_CONNECTIONS', 50))
+    ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 16))
+    
+    # Coalescing of concurrent cache misses
+    SINGLE_FLIGHT_LOCK_TTL = 15
+    SINGLE_FLIGHT_WAIT_TIMEOUT = 12
+    
+    # Engines to serve, in default order; others are never imported
+    ENABLED_ENGINES = [name for name in os.getenv('ENABLED_ENGINES', 'duckduckgo,bing').split(',') if name]
     
     # Search
     MAX_RESULTS_LIMIT = 50
@@ -21,6 +72,83 @@ class Config:
     THREAD_POOL_SIZE = 2
     REQUEST_TIMEOUT = 10
     
+    # Default context_budget: tokens, or characters as '<n>chars'; unset
+    # joins every result into the context
+    DEFAULT_CONTEXT_BUDGET = os.getenv('DEFAULT_CONTEXT_BUDGET')
+    
+    # Latency budget: rank whatever arrived by the deadline, drop the rest
+    SEARCH_DEADLINE_MS = int(os.getenv('SEARCH_DEADLINE_MS', 4000))
+    
+    # Responses missing an engine (seconds, 0 disables): cached briefly,
+    # with no stale period, so a slow engine does not disable the cache
+    PARTIAL_CACHE_TIMEOUT = int(os.getenv('PARTIAL_CACHE_TIMEOUT', 15))
+    
+    # Hedged requests: re-send to an engine slower than its observed p95
+    HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'false').lower() == 'true'
+    HEDGE_PERCENTILE = 95
+    HEDGE_MIN_SAMPLES = 20
+    
+    # Per-engine circuit breaker, shared across workers through Redis
+    BREAKER_WINDOW = 20
+    BREAKER_MIN_REQUESTS = 10
+    BREAKER_ERROR_RATE = 0.5
+    BREAKER_EMPTY_RATE = 0.8
+    BREAKER_COOLDOWN = 30
+    BREAKER_SYNC_INTERVAL = 1.0
+    
+    # Upstream scheduler: requests in flight across all engines, and a
+    # token bucket per engine (requests/s) that halves on 429/503 and
+    # creeps back up by ENGINE_RATE_INCREASE per successful response
+    UPSTREAM_MAX_CONCURRENCY = int(os.getenv('UPSTREAM_MAX_CONCURRENCY', 16))
+    ENGINE_RATE_LIMITS = {
+        'duckduckgo': 5.0,
+        'bing': 5.0
+    }
+    ENGINE_RATE_DEFAULT = 5.0
+    ENGINE_RATE_BURST = 10
+    ENGINE_RATE_MIN = 0.2
+    ENGINE_RATE_INCREASE = 0.05
+    ENGINE_RATE_DECREASE = 0.5
+    
+    # POST /search/batch
+    BATCH_MAX_QUERIES = 200
+    BATCH_CONCURRENCY = 8
+    
+    # Per-engine result cache
+    ENGINE_CACHE_DEFAULT_TIMEOUT = 300
+    
+    # Negative caching (seconds, 0 disables): empty results, for responses
+    # and per engine, and per-engine failures are kept briefly so they are
+    # not retried upstream on every request, e.g. during an engine outage
+    NEGATIVE_CACHE_EMPTY_TIMEOUT = int(os.getenv('NEGATIVE_CACHE_EMPTY_TIMEOUT', 60))
+    NEGATIVE_CACHE_ERROR_TIMEOUT = int(os.getenv('NEGATIVE_CACHE_ERROR_TIMEOUT', 15))
+    ENGINE_CACHE_TIMEOUTS = {
+        'duckduckgo': 600,
+        'bing': 300
+    }
+    
+    # Upstream HTTP connection pooling
+    HTTP_POOL_SIZE = 10
+    HTTP_KEEPALIVE_TIMEOUT = 30
+    HTTP_MAX_RETRIES = 2
+    HTTP_RETRY_BACKOFF = 0.3
+    
+    # Engine endpoint overrides, e.g. the benchmark stub server
+    ENGINE_URLS = {}
+    
+    # Result page parser: 'html.parser', 'lxml', 'strainer' or 'streaming'
+    PARSER_BACKEND = os.getenv('PARSER_BACKEND', 'strainer')
+    
+    # Threads parsing result pages for the async engine layer, off the event loop
+    PARSE_POOL_SIZE = int(os.getenv('PARSE_POOL_SIZE', 4))
+    
+    # Result ranking: 'term_frequency' or 'bm25', with per-engine priors
+    RANKER = os.getenv('RANKER', 'term_frequency')
+    RANKER_ENGINE_WEIGHTS = {
+        'duckduckgo': 1.0,
+        'bing': 1.0
+    }
+    
     # User Agent
     USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 
@@ -39,6 +167,9 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     CACHE_TYPE = 'SimpleCache'
+    
+    # Apps in one test process must not see each other's entries
+    CACHE_SHM_ENABLED = False
 
 
 # Config dictionary
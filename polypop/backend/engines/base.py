@@ -1,37 +1,359 @@
 """
 Base search engine interface
 """
+import asyncio
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from collections import deque
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from bs4.element import Tag
+from urllib3.util.retry import Retry
+
+from engines.parsers import PARSER_BACKENDS, select_containers
 from models.search_result import SearchResult
+from utils import metrics
 
 
 class BaseSearchEngine(ABC):
     """Abstract base class for search engines"""
     
-    def __init__(self, timeout: int = 10, user_agent: str = None):
+    def __init__(
+        self,
+        timeout: int = 10,
+        user_agent: str = None,
+        pool_size: int = 10,
+        keepalive_timeout: int = 30,
+        max_retries: int = 2,
+        retry_backoff: float = 0.3,
+        parser: str = 'html.parser',
+        url: str = None,
+        parse_executor: Optional[Executor] = None
+    ):
+        if parser not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend: {parser}")
+        
         self.timeout = timeout
         self.user_agent = user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.parser = parser
+        self._url = url
+        
+        # Async fetches parse pages here, not on the event loop they share;
+        # None uses the loop's default executor
+        self.parse_executor = parse_executor
+        
+        self._parse_lock = threading.Lock()
+        self._parse_stats = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        
+        # Recent successful fetch latencies, used to decide when to hedge
+        self._latencies_ms = deque(maxlen=200)
+        self.hedged_requests = 0
+        
+        # Long-lived keep-alive session; gzip/brotli are decoded transparently
+        self.session = self._create_session()
+        
+        # aiohttp sessions are bound to the event loop they were created on,
+        # so the async session is opened lazily with the same pool settings
+        self._async_session: Optional[aiohttp.ClientSession] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_stats = {'connections_opened': 0, 'connections_reused': 0}
     
+    @property
     @abstractmethod
+    def name(self) -> str:
+        """Return the engine name"""
+        pass
+    
+    @property
+    @abstractmethod
+    def default_url(self) -> str:
+        """Return the public search endpoint URL"""
+        pass
+    
+    @property
+    def url(self) -> str:
+        """Return the search endpoint URL, honouring any override"""
+        return self._url or self.default_url
+    
+    @property
+    @abstractmethod
+    def container(self) -> Tuple[str, str]:
+        """Return the (tag, class) of a result container"""
+        pass
+    
+    @abstractmethod
+    def extract_result(self, container: Tag) -> Optional[SearchResult]:
+        """
+        Extract a result from one result container
+        
+        Args:
+            container: Result container tag
+        
+        Returns:
+            SearchResult object, or None if the container is incomplete
+        """
+        pass
+    
+    def parse_results(self, html: str, num_results: int) -> List[SearchResult]:
+        """
+        Extract results from a search results page
+        
+        Args:
+            html: Raw HTML of the results page
+            num_results: Maximum number of results to return
+        
+        Returns:
+            List of SearchResult objects
+        """
+        started = time.perf_counter()
+        tag, css_class = self.container
+        results = []
+        for container in select_containers(html, tag, css_class, num_results, self.parser):
+            result = self.extract_result(container)
+            if result:
+                results.append(result)
+        
+        self._record_parse_time((time.perf_counter() - started) * 1000)
+        return results
+    
     def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
         """
-        Execute search query
+        Execute search query (blocking)
         
         Args:
             query: Search query string
             num_results: Maximum number of results to return
-            
+        
         Returns:
             List of SearchResult objects
         """
-        pass
+        started = time.perf_counter()
+        try:
+            response = self.session.get(
+                self.url,
+                params=self._get_params(query),
+                timeout=self.timeout
+            )
+            metrics.UPSTREAM_RESPONSES.labels(self.name, response.status_code).inc()
+            response.raise_for_status()
+            results = self.parse_results(response.text, num_results)
+            metrics.UPSTREAM_DURATION.labels(self.name).observe(time.perf_counter() - started)
+            return results
+        
+        except Exception as e:
+            print(f"{self.name} search error: {str(e)}")
+            return []
     
-    @property
-    @abstractmethod
-    def name(self) -> str:
-        """Return the engine name"""
-        pass
+    async def search_async(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        """
+        Execute search query without blocking the event loop
+        
+        Args:
+            query: Search query string
+            num_results: Maximum number of results to return
+        
+        Returns:
+            List of SearchResult objects
+        """
+        try:
+            return await self.fetch_results_async(query, num_results)
+        
+        except Exception as e:
+            print(f"{self.name} search error: {str(e) or type(e).__name__}")
+            return []
+    
+    async def fetch_results_async(self, query: str, num_results: int = 5) -> List[SearchResult]:
+        """
+        Execute search query, raising on upstream or parse errors
+        
+        Lets callers tell a failed engine apart from one with no results.
+        
+        Args:
+            query: Search query string
+            num_results: Maximum number of results to return
+        
+        Returns:
+            List of SearchResult objects
+        """
+        started = time.perf_counter()
+        html = await self._fetch_async(query)
+        results = await asyncio.get_running_loop().run_in_executor(
+            self.parse_executor, self.parse_results, html, num_results
+        )
+        elapsed = time.perf_counter() - started
+        self._latencies_ms.append(elapsed * 1000)
+        metrics.UPSTREAM_DURATION.labels(self.name).observe(elapsed)
+        return results
+    
+    def latency_percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Get a percentile of recent successful fetch latencies
+        
+        Args:
+            percentile: Percentile to compute, e.g. 95
+            min_samples: Samples required before an estimate is returned
+        
+        Returns:
+            Latency in milliseconds, or None with too few samples
+        """
+        samples = sorted(self._latencies_ms)
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+    
+    def get_latency_stats(self) -> dict:
+        """
+        Get recent fetch latency and hedging statistics
+        
+        Returns:
+            Dict with p50/p95 latency in ms, sample count and hedges sent
+        """
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        return {
+            'samples': len(self._latencies_ms),
+            'p50_ms': round(p50, 1) if p50 is not None else None,
+            'p95_ms': round(p95, 1) if p95 is not None else None,
+            'hedged_requests': self.hedged_requests
+        }
+    
+    def get_connection_stats(self) -> dict:
+        """
+        Get connection reuse statistics for both HTTP sessions
+        
+        Returns:
+            Dict with request, connection and reuse counts
+        """
+        requests_sent = 0
+        connections_opened = 0
+        adapter = self.session.get_adapter(self.url)
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections_opened += pool.num_connections
+        
+        requests_sent += self._async_stats['connections_opened'] + self._async_stats['connections_reused']
+        connections_opened += self._async_stats['connections_opened']
+        reused = requests_sent - connections_opened
+        
+        return {
+            'requests': requests_sent,
+            'connections_opened': connections_opened,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / requests_sent, 3) if requests_sent else 0.0
+        }
+    
+    def get_parse_stats(self) -> dict:
+        """
+        Get parse time statistics
+        
+        Returns:
+            Dict with parser backend, page count and parse times in ms
+        """
+        with self._parse_lock:
+            stats = dict(self._parse_stats)
+        stats['avg_ms'] = stats['total_ms'] / stats['count'] if stats['count'] else 0.0
+        stats['parser'] = self.parser
+        return {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
+    
+    def close(self):
+        """Close the blocking HTTP session"""
+        self.session.close()
+    
+    async def aclose(self):
+        """Close the async HTTP session, if one was opened"""
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+            self._async_loop = None
+    
+    def _record_parse_time(self, elapsed_ms: float):
+        metrics.PARSE_DURATION.labels(self.name, self.parser).observe(elapsed_ms / 1000)
+        with self._parse_lock:
+            self._parse_stats['count'] += 1
+            self._parse_stats['total_ms'] += elapsed_ms
+            self._parse_stats['max_ms'] = max(self._parse_stats['max_ms'], elapsed_ms)
+    
+    def _create_session(self) -> requests.Session:
+        """Create the pooled session used by blocking searches"""
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=0,
+            backoff_factor=self.retry_backoff
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(self._get_headers())
+        return session
+    
+    async def _fetch_async(self, query: str) -> str:
+        """Fetch a results page, retrying connect errors with backoff"""
+        session = self._get_async_session()
+        attempt = 0
+        while True:
+            try:
+                async with session.get(self.url, params=self._get_params(query)) as response:
+                    metrics.UPSTREAM_RESPONSES.labels(self.name, response.status).inc()
+                    response.raise_for_status()
+                    return await response.text()
+            except aiohttp.ClientConnectorError:
+                if attempt >= self.max_retries:
+                    metrics.UPSTREAM_RESPONSES.labels(self.name, 'connect_error').inc()
+                    raise
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+            except asyncio.TimeoutError:
+                metrics.UPSTREAM_RESPONSES.labels(self.name, 'timeout').inc()
+                raise
+    
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        """Get the aiohttp session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_loop is not loop:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_created)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+            
+            self._async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=self.pool_size,
+                    keepalive_timeout=self.keepalive_timeout
+                ),
+                headers=self._get_headers(),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace_config]
+            )
+            self._async_loop = loop
+        return self._async_session
+    
+    async def _on_connection_created(self, session, context, params):
+        self._async_stats['connections_opened'] += 1
+    
+    async def _on_connection_reused(self, session, context, params):
+        self._async_stats['connections_reused'] += 1
+    
+    def _get_params(self, query: str) -> dict:
+        """Get query string parameters for a search"""
+        return {'q': query}
     
     def _get_headers(self) -> dict:
         """Get common request headers"""
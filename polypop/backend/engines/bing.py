@@ -1,11 +1,11 @@
 """
 Bing search engine implementation
 """
-import requests
-from bs4 import BeautifulSoup
-from typing import List
+from bs4.element import Tag
+from typing import Optional, Tuple
 from engines.base import BaseSearchEngine
 from models.search_result import SearchResult
+from utils.urls import unwrap_redirect
 
 
 class BingEngine(BaseSearchEngine):
@@ -15,44 +15,34 @@ class BingEngine(BaseSearchEngine):
     def name(self) -> str:
         return 'bing'
     
-    def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
+    @property
+    def default_url(self) -> str:
+        return 'https://www.bing.com/search'
+    
+    @property
+    def container(self) -> Tuple[str, str]:
+        return ('li', 'b_algo')
+    
+    def extract_result(self, container: Tag) -> Optional[SearchResult]:
         """
-        Search Bing and extract results
+        Extract a result from one Bing result container
         
         Args:
-            query: Search query
-            num_results: Max results to return
+            container: Result container tag
             
         Returns:
-            List of SearchResult objects
+            SearchResult object, or None if the container is incomplete
         """
-        try:
-            response = requests.get(
-                'https://www.bing.com/search',
-                params={'q': query},
-                headers=self._get_headers(),
-                timeout=self.timeout
+        title_elem = container.find('h2')
+        snippet_elem = container.find('p')
+        link_elem = container.find('a')
+        
+        if title_elem and snippet_elem and link_elem:
+            return SearchResult(
+                title=title_elem.get_text(strip=True),
+                snippet=snippet_elem.get_text(strip=True),
+                url=unwrap_redirect(link_elem.get('href', '')),
+                source=self.name
             )
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-            
-            for result in soup.find_all('li', class_='b_algo')[:num_results]:
-                title_elem = result.find('h2')
-                snippet_elem = result.find('p')
-                link_elem = result.find('a')
-                
-                if title_elem and snippet_elem and link_elem:
-                    results.append(SearchResult(
-                        title=title_elem.get_text(strip=True),
-                        snippet=snippet_elem.get_text(strip=True),
-                        url=link_elem.get('href', ''),
-                        source=self.name
-                    ))
-            
-            return results
-            
-        except Exception as e:
-            print(f"Bing search error: {str(e)}")
-            return []
\ No newline at end of file
+        
+        return None
\ No newline at end of file
@@ -1,11 +1,11 @@
 """
 DuckDuckGo search engine implementation
 """
-import requests
-from bs4 import BeautifulSoup
-from typing import List
+from bs4.element import Tag
+from typing import Optional, Tuple
 from engines.base import BaseSearchEngine
 from models.search_result import SearchResult
+from utils.urls import unwrap_redirect
 
 
 class DuckDuckGoEngine(BaseSearchEngine):
@@ -15,43 +15,33 @@ class DuckDuckGoEngine(BaseSearchEngine):
     def name(self) -> str:
         return 'duckduckgo'
     
-    def search(self, query: str, num_results: int = 5) -> List[SearchResult]:
+    @property
+    def default_url(self) -> str:
+        return 'https://html.duckduckgo.com/html/'
+    
+    @property
+    def container(self) -> Tuple[str, str]:
+        return ('div', 'result')
+    
+    def extract_result(self, container: Tag) -> Optional[SearchResult]:
         """
-        Search DuckDuckGo and extract results
+        Extract a result from one DuckDuckGo result container
         
         Args:
-            query: Search query
-            num_results: Max results to return
+            container: Result container tag
             
         Returns:
-            List of SearchResult objects
+            SearchResult object, or None if the container is incomplete
         """
-        try:
-            response = requests.get(
-                'https://html.duckduckgo.com/html/',
-                params={'q': query},
-                headers=self._get_headers(),
-                timeout=self.timeout
+        title_elem = container.find('a', class_='result__a')
+        snippet_elem = container.find('a', class_='result__snippet')
+        
+        if title_elem and snippet_elem:
+            return SearchResult(
+                title=title_elem.get_text(strip=True),
+                snippet=snippet_elem.get_text(strip=True),
+                url=unwrap_redirect(title_elem.get('href', '')),
+                source=self.name
             )
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-            
-            for result in soup.find_all('div', class_='result')[:num_results]:
-                title_elem = result.find('a', class_='result__a')
-                snippet_elem = result.find('a', class_='result__snippet')
-                
-                if title_elem and snippet_elem:
-                    results.append(SearchResult(
-                        title=title_elem.get_text(strip=True),
-                        snippet=snippet_elem.get_text(strip=True),
-                        url=title_elem.get('href', ''),
-                        source=self.name
-                    ))
-            
-            return results
-            
-        except Exception as e:
-            print(f"DuckDuckGo search error: {str(e)}")
-            return []
\ No newline at end of file
+        
+        return None
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Pluggable HTML parser backends for engine result extraction
+
+Every backend returns the same result containers, in document order,
+as BeautifulSoup tags, so engines keep a single extraction routine.
+"""
+import re
+from typing import List
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import Tag
+from lxml import etree
+
+
+PARSER_BACKENDS = ('html.parser', 'lxml', 'strainer', 'streaming')
+
+# Characters fed to the streaming parser between checks for enough results
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+def select_containers(
+    html: str,
+    tag: str,
+    css_class: str,
+    limit: int,
+    backend: str = 'html.parser'
+) -> List[Tag]:
+    """
+    Find the first result containers on a results page
+    
+    Args:
+        html: Raw HTML of the results page
+        tag: Container tag name, e.g. 'li'
+        css_class: Class the container carries, e.g. 'b_algo'
+        limit: Maximum number of containers to return
+        backend: One of PARSER_BACKENDS
+    
+    Returns:
+        List of container tags
+    """
+    if limit <= 0:
+        return []
+    
+    if backend == 'html.parser':
+        soup = BeautifulSoup(html, 'html.parser')
+    elif backend == 'lxml':
+        soup = BeautifulSoup(html, 'lxml')
+    elif backend == 'strainer':
+        # Only build the tree for result containers and their children
+        # (matched as a regex: the strainer sees the raw, unsplit class attribute)
+        class_re = re.compile(r'(?:^|\s)' + re.escape(css_class) + r'(?:\s|$)')
+        soup = BeautifulSoup(html, 'lxml', parse_only=SoupStrainer(tag, class_=class_re))
+    elif backend == 'streaming':
+        return _stream_containers(html, tag, css_class, limit)
+    else:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    
+    return soup.find_all(tag, class_=css_class, limit=limit)
+
+
+def _stream_containers(html: str, tag: str, css_class: str, limit: int) -> List[Tag]:
+    """Feed the page to a pull parser and stop after limit containers"""
+    parser = etree.HTMLPullParser(events=('end',), tag=tag)
+    fragments = []
+    
+    def collect() -> bool:
+        for _, element in parser.read_events():
+            if css_class in (element.get('class') or '').split():
+                fragments.append(etree.tostring(element, encoding='unicode', method='html', with_tail=False))
+                if len(fragments) >= limit:
+                    return True
+        return False
+    
+    done = False
+    for offset in range(0, len(html), STREAM_CHUNK_SIZE):
+        parser.feed(html[offset:offset + STREAM_CHUNK_SIZE])
+        done = collect()
+        if done:
+            break
+    if not done:
+        parser.close()
+        collect()
+    
+    # Containers are small, so re-parsing each one on its own is cheap
+    containers = []
+    for fragment in fragments:
+        container = BeautifulSoup(fragment, 'html.parser').find(tag)
+        if container is not None:
+            containers.append(container)
+    return containers
\ No newline at end of file
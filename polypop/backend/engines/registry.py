@@ -0,0 +1,98 @@
+"""
+Registry of search engines, imported and built on first use
+"""
+import importlib
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Engine name -> (module, class); modules are only imported when enabled
+# engines are first used, so disabled ones never load their dependencies
+ENGINE_CLASSES: Dict[str, Tuple[str, str]] = {
+    'duckduckgo': ('engines.duckduckgo', 'DuckDuckGoEngine'),
+    'bing': ('engines.bing', 'BingEngine')
+}
+
+
+class EngineRegistry:
+    """Enabled engines by name, each constructed the first time it is needed"""
+    
+    def __init__(self, names: List[str], engine_urls: Dict[str, str] = None, **options):
+        """
+        Args:
+            names: Enabled engine names, in default order
+            engine_urls: Endpoint overrides by engine name
+            options: Constructor keyword arguments shared by every engine
+        """
+        unknown = [name for name in names if name not in ENGINE_CLASSES]
+        if unknown:
+            raise ValueError(f"Unknown engines: {', '.join(unknown)}")
+        
+        self.names = list(dict.fromkeys(names))
+        self.engine_urls = engine_urls or {}
+        self.options = options
+        self._engines = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name: str):
+        """
+        Get an enabled engine, importing and constructing it if needed
+        
+        Args:
+            name: Engine name
+        
+        Returns:
+            Engine instance, or None if it is disabled or failed to load
+        """
+        engine = self._engines.get(name)
+        if engine is not None or name not in self.names:
+            return engine
+        
+        with self._lock:
+            if name in self._engines:
+                return self._engines[name]
+            if name in self._errors:
+                return None
+            
+            module_name, class_name = ENGINE_CLASSES[name]
+            try:
+                engine_class = getattr(importlib.import_module(module_name), class_name)
+                engine = engine_class(url=self.engine_urls.get(name), **self.options)
+            except Exception as e:
+                self._errors[name] = str(e) or type(e).__name__
+                print(f"❌ Engine {name} failed to load: {self._errors[name]}")
+                return None
+            
+            self._engines[name] = engine
+            return engine
+    
+    def load_all(self) -> Dict[str, Optional[str]]:
+        """
+        Load every enabled engine
+        
+        Returns:
+            Dict mapping engine name to its load error, or None if loaded
+        """
+        return {name: None if self.get(name) is not None else self._errors.get(name) for name in self.names}
+    
+    def loaded(self) -> Dict[str, object]:
+        """
+        Get the engines constructed so far, without loading any
+        
+        Returns:
+            Dict mapping engine name to engine instance
+        """
+        return dict(self._engines)
+    
+    def get_error(self, name: str) -> Optional[str]:
+        """Get the error an engine failed to load with, if any"""
+        return self._errors.get(name)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+    
+    def __len__(self) -> int:
+        return len(self.names)
\ No newline at end of file
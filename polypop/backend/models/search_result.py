@@ -1,8 +1,11 @@
 """
 Data models for search results
 """
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from utils.context import build_budgeted_context
+from utils.fields import project_response
 
 
 @dataclass
@@ -12,7 +15,7 @@ class SearchResult:
     snippet: str
     url: str
     source: str
-    relevance_score: int = 0
+    relevance_score: float = 0
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -25,6 +28,55 @@ class SearchResult:
         }
 
 
+@dataclass
+class EngineResults:
+    """Outcome of one engine's part of a search"""
+    engine: str
+    results: List[SearchResult] = field(default_factory=list)
+    error: Optional[str] = None
+    cached: bool = False
+    negative_cached: bool = False
+    timed_out: bool = False
+    circuit_open: bool = False
+    queued: bool = False
+    queue_ms: float = 0.0
+    elapsed_ms: float = 0.0
+    
+    @property
+    def success(self) -> bool:
+        return self.error is None
+    
+    @property
+    def status(self) -> str:
+        """One of 'ok', 'cached', 'error', 'timeout', 'circuit_open' or 'queued'"""
+        if self.circuit_open:
+            return 'circuit_open'
+        if self.queued:
+            return 'queued'
+        if self.timed_out:
+            return 'timeout'
+        if self.error:
+            return 'error'
+        return 'cached' if self.cached else 'ok'
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        response = {
+            'engine': self.engine,
+            'success': self.success,
+            'status': self.status,
+            'data': [r.to_dict() for r in self.results],
+            'count': len(self.results),
+            'cached': self.cached,
+            'negative_cached': self.negative_cached,
+            'queue_ms': round(self.queue_ms, 1),
+            'elapsed_ms': round(self.elapsed_ms, 1)
+        }
+        if self.error:
+            response['error'] = self.error
+        return response
+
+
 @dataclass
 class SearchResponse:
     """Complete search response"""
@@ -34,18 +86,46 @@ class SearchResponse:
     context: str
     count: int
     cached: bool = False
+    stale: bool = False
+    negative_cached: bool = False
     message: Optional[str] = None
+    engine_status: Dict[str, str] = field(default_factory=dict)
     
-    def to_dict(self):
-        """Convert to dictionary"""
+    @property
+    def failed_engines(self) -> List[str]:
+        """Engines that errored, missed the deadline or were skipped by their breaker"""
+        return [
+            name for name, status in self.engine_status.items()
+            if status in ('error', 'timeout', 'circuit_open')
+        ]
+    
+    @property
+    def missing_engines(self) -> List[str]:
+        """Engines without results: failed, or still queued upstream at the deadline"""
+        return self.failed_engines + [name for name, status in self.engine_status.items() if status == 'queued']
+    
+    def to_dict(self, fields: Optional[Tuple[str, ...]] = None, context_budget: Optional[int] = None):
+        """
+        Convert to dictionary
+        
+        Args:
+            fields: Fields to keep, as returned by parse_fields; None keeps all
+            context_budget: Maximum context length in characters, if any
+        """
         response = {
             'success': self.success,
             'query': self.query,
             'data': self.data,
             'context': self.context,
             'count': self.count,
-            'cached': self.cached
+            'cached': self.cached,
+            'stale': self.stale,
+            'negative_cached': self.negative_cached
         }
         if self.message:
             response['message'] = self.message
-        return response
\ No newline at end of file
+        if self.engine_status:
+            response['engines'] = self.engine_status
+        if context_budget is not None:
+            response['context'], response['context_tokens'] = build_budgeted_context(self.data, context_budget)
+        return project_response(response, fields)
\ No newline at end of file
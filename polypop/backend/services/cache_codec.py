@@ -0,0 +1,134 @@
+"""
+Compact, versioned binary encoding of cache entries
+
+Layout: MAGIC (2 bytes), format version (1 byte), compression (1 byte),
+then the payload. The payload is a pickled tuple:
+    
+    (kind, fresh_until, expires_at, meta, records)
+
+where records are (title, snippet, url, source, relevance_score) tuples,
+so dict keys are not repeated per result, and response entries drop the
+'context' string, which only repeats titles and snippets and is rebuilt
+on read. Payloads above a size threshold are compressed.
+"""
+import pickle
+import struct
+import zlib
+from typing import Optional
+
+from utils.formatters import build_context
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+MAGIC = b'PP'
+VERSION = 1
+HEADER = struct.Struct('>2sBB')
+
+COMPRESSION_IDS = {'none': 0, 'zlib': 1, 'zstd': 2}
+COMPRESSION_NAMES = {value: key for key, value in COMPRESSION_IDS.items()}
+
+RECORD_FIELDS = ('title', 'snippet', 'url', 'source', 'relevance_score')
+
+RESPONSE = 'response'
+ENGINE = 'engine'
+
+
+class CacheCodec:
+    """Encode cache entries compactly and decode both new and legacy entries"""
+    
+    def __init__(self, compression: str = 'zlib', threshold: int = 1024, level: int = 3):
+        if compression not in COMPRESSION_IDS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            print("⚠️ zstandard is not installed, compressing cache entries with zlib")
+            compression = 'zlib'
+        
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+        self._zstd_compressor = zstandard.ZstdCompressor(level=level) if compression == 'zstd' else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+    
+    def encode(self, entry: dict) -> bytes:
+        """
+        Encode a response or per-engine results entry
+        
+        Args:
+            entry: Entry dict with 'value', 'fresh_until' and 'expires_at'
+        
+        Returns:
+            Encoded bytes
+        """
+        value = entry['value']
+        if 'results' in value:
+            kind, records_key = ENGINE, 'results'
+        else:
+            kind, records_key = RESPONSE, 'data'
+        
+        meta = {key: item for key, item in value.items() if key not in (records_key, 'context')}
+        records = tuple(
+            tuple(record.get(field) for field in RECORD_FIELDS)
+            for record in value[records_key]
+        )
+        payload = pickle.dumps(
+            (kind, entry['fresh_until'], entry['expires_at'], meta, records),
+            pickle.HIGHEST_PROTOCOL
+        )
+        
+        compression = self.compression if len(payload) >= self.threshold else 'none'
+        if compression == 'zlib':
+            payload = zlib.compress(payload, self.level)
+        elif compression == 'zstd':
+            payload = self._zstd_compressor.compress(payload)
+        return HEADER.pack(MAGIC, VERSION, COMPRESSION_IDS[compression]) + payload
+    
+    def decode(self, stored) -> Optional[dict]:
+        """
+        Decode a stored entry
+        
+        Entries written before this format (plain dicts) are returned
+        unchanged, so old and new workers can share a cache during rollout.
+        
+        Args:
+            stored: Value read from the cache
+        
+        Returns:
+            Entry dict, or None if it cannot be decoded
+        """
+        if not isinstance(stored, (bytes, bytearray)):
+            return stored
+        if len(stored) < HEADER.size:
+            return None
+        
+        magic, version, compression = HEADER.unpack_from(stored)
+        if magic != MAGIC or version != VERSION:
+            print(f"Cache decode error: unknown format {magic!r} v{version}")
+            return None
+        
+        payload = memoryview(stored)[HEADER.size:]
+        name = COMPRESSION_NAMES.get(compression)
+        if name == 'zlib':
+            payload = zlib.decompress(payload)
+        elif name == 'zstd':
+            if self._zstd_decompressor is None:
+                print("Cache decode error: zstd entry but zstandard is not installed")
+                return None
+            payload = self._zstd_decompressor.decompress(payload)
+        elif name != 'none':
+            print(f"Cache decode error: unknown compression {compression}")
+            return None
+        
+        kind, fresh_until, expires_at, meta, records = pickle.loads(payload)
+        value = dict(meta)
+        results = [dict(zip(RECORD_FIELDS, record)) for record in records]
+        if kind == ENGINE:
+            value['results'] = results
+        else:
+            value['data'] = results
+            value['context'] = build_context(results)
+        
+        return {'value': value, 'fresh_until': fresh_until, 'expires_at': expires_at}
\ No newline at end of file
@@ -1,32 +1,91 @@
 import hashlib
-from typing import Optional
+import pickle
+import socket
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
 from flask_caching import Cache
 
+from models.search_result import EngineResults, SearchResult
+from services.cache_codec import CacheCodec
+from services.memory_cache import MemoryCache
+from services.shared_cache import SharedMemoryCache
+from utils import metrics
+from utils.normalize import normalize_query
+
 
 class CacheService:
     """Service for handling cache operations"""
     
-    def __init__(self, cache: Cache):
+    def __init__(
+        self,
+        cache: Cache,
+        memory_cache: MemoryCache = None,
+        invalidation_channel: str = 'polypop:cache-invalidate',
+        codec: CacheCodec = None,
+        payload_format: str = 'legacy',
+        shared_cache: SharedMemoryCache = None
+    ):
+        if payload_format not in ('compact', 'legacy'):
+            raise ValueError(f"Unknown cache payload format: {payload_format}")
+        
         self.cache = cache
+        self.memory_cache = memory_cache
+        self.invalidation_channel = invalidation_channel
+        
+        # Serialized entries shared by the workers on this host, between
+        # L1 and Redis
+        self.shared_cache = shared_cache
+        
+        # Entries in either format are always readable; payload_format only
+        # picks what is written, so readers can be rolled out first
+        self.codec = codec or CacheCodec()
+        self.payload_format = payload_format
+        
+        # Non-blocking Redis client for the *_async reads, set by the ASGI
+        # entry point on its event loop; writes stay on the cache client
+        self.async_redis = None
+        self.stats = {
+            'l1_hits': 0,
+            'l1_misses': 0,
+            'shm_hits': 0,
+            'shm_misses': 0,
+            'l2_hits': 0,
+            'l2_misses': 0
+        }
+        
+        # Other workers drop their L1 copy when we write or clear a key, and
+        # workers on other hosts their shared memory copy too
+        self._origin = uuid.uuid4().hex
+        self._shared_origin = f"{socket.gethostname()}:{shared_cache.path}" if shared_cache is not None else ''
+        if self._has_local_tiers() and self.get_redis_client() is not None:
+            threading.Thread(
+                target=self._listen_for_invalidations,
+                name='cache-invalidation',
+                daemon=True
+            ).start()
     
-    def get_cache_key(self, query: str, engines: list, max_results: int) -> str:
+    def get_cache_key(self, query: str, engines: list) -> str:
         """
         Generate cache key from search parameters
         
+        The key leaves out max_results: entries hold the ranked list at
+        MAX_RESULTS_LIMIT and smaller requests are sliced from it.
+        
         Args:
             query: Search query
-            engines: List of engine names
-            max_results: Maximum results
+            engines: List of known engine names
             
         Returns:
             Cache key string
         """
-        engines_str = ','.join(sorted(engines))
-        return f"search:{query}:{engines_str}:{max_results}"
+        engines_str = ','.join(sorted(set(engines)))
+        return f"search:{normalize_query(query)}:{engines_str}"
     
     def get(self, cache_key: str) -> Optional[dict]:
         """
-        Get cached response
+        Get cached response, fresh or stale
         
         Args:
             cache_key: Cache key
@@ -34,30 +93,348 @@ class CacheService:
         Returns:
             Cached response dict or None
         """
-        try:
-            return self.cache.get(cache_key)
-        except Exception as e:
-            print(f"Cache get error: {str(e)}")
+        response, _ = self.lookup(cache_key)
+        return response
+    
+    def lookup(self, cache_key: str) -> Tuple[Optional[dict], bool]:
+        """
+        Get cached response along with its staleness
+        
+        Entries are fresh until their soft TTL and stale, but still served,
+        until Redis expires them at the hard TTL.
+        
+        Args:
+            cache_key: Cache key
+            
+        Returns:
+            Tuple of (cached response dict or None, whether it is stale)
+        """
+        return self._count_lookup(self._unwrap(self._get_entry(cache_key)))
+    
+    def lookup_entry(self, cache_key: str) -> Optional[dict]:
+        """
+        Get a cached response with its soft and hard expiry times
+        
+        Args:
+            cache_key: Cache key
+            
+        Returns:
+            Dict with 'value' (a shallow copy), 'stale', 'fresh_until'
+            and 'expires_at', or None
+        """
+        return self._as_lookup_entry(self._get_entry(cache_key))
+    
+    async def lookup_entry_async(self, cache_key: str) -> Optional[dict]:
+        """
+        Coroutine version of lookup_entry, reading Redis on async_redis
+        
+        Args:
+            cache_key: Cache key
+            
+        Returns:
+            Same as lookup_entry
+        """
+        return self._as_lookup_entry(await self._get_entry_async(cache_key))
+    
+    def _as_lookup_entry(self, entry: Optional[dict]) -> Optional[dict]:
+        """Count a response lookup and shape it for lookup_entry"""
+        value, stale = self._count_lookup(self._unwrap(entry))
+        if value is None:
             return None
+        
+        # Entries written before soft TTLs existed are fresh but carry no
+        # times, so nothing derived from them outlives this request
+        now = time.time()
+        return {
+            'value': value,
+            'stale': stale,
+            'fresh_until': entry.get('fresh_until', now),
+            'expires_at': entry.get('expires_at', now)
+        }
+    
+    def lookup_many(self, cache_keys: List[str]) -> List[Tuple[Optional[dict], bool]]:
+        """
+        Get several cached responses with one Redis round trip
+        
+        Keys missing from L1 are read together with a single MGET.
+        
+        Args:
+            cache_keys: Cache keys
+            
+        Returns:
+            List of (cached response dict or None, whether it is stale),
+            in the order of cache_keys
+        """
+        entries = {}
+        missing = []
+        for cache_key in dict.fromkeys(cache_keys):
+            entry = self._get_memory_entry(cache_key)
+            if entry is None:
+                missing.append(cache_key)
+            else:
+                entries[cache_key] = entry
+        
+        missing = [cache_key for cache_key in missing if not self._add_shared_entry(cache_key, entries)]
+        
+        if missing:
+            try:
+                values = self.cache.get_many(*missing)
+            except Exception as e:
+                print(f"Cache get_many error: {str(e)}")
+                values = [None] * len(missing)
+            
+            for cache_key, stored in zip(missing, values):
+                entry = self._decode(cache_key, stored)
+                if entry is None:
+                    self._count('l2', 'miss')
+                    continue
+                self._count('l2', 'hit')
+                self._fill_shared(cache_key, stored, entry.get('expires_at'))
+                self._fill_memory(cache_key, entry)
+                entries[cache_key] = entry
+        
+        return [self._count_lookup(self._unwrap(entries.get(cache_key))) for cache_key in cache_keys]
     
-    def set(self, cache_key: str, response: dict, timeout: int = 300) -> bool:
+    def set(
+        self,
+        cache_key: str,
+        response: dict,
+        timeout: int = 300,
+        hard_timeout: int = None
+    ) -> bool:
         """
-        Store response in cache
+        Store response in both cache tiers
         
         Args:
             cache_key: Cache key
             response: Response to cache
-            timeout: Cache timeout in seconds
+            timeout: Soft TTL in seconds, after which the entry is stale
+            hard_timeout: Hard TTL in seconds, after which it is evicted
             
         Returns:
             True if successful
         """
-        try:
-            self.cache.set(cache_key, response, timeout=timeout)
-            return True
-        except Exception as e:
-            print(f"Cache set error: {str(e)}")
+        hard_timeout = max(hard_timeout or timeout, timeout)
+        now = time.time()
+        entry = {
+            'value': response,
+            'fresh_until': now + timeout,
+            'expires_at': now + hard_timeout
+        }
+        return self._set_entry(cache_key, entry, hard_timeout)
+    
+    def get_body_key(
+        self,
+        cache_key: str,
+        query: str,
+        max_results: int,
+        fields: tuple = None,
+        context_budget: int = None
+    ) -> str:
+        """
+        Generate the key of a rendered response body
+        
+        Bodies echo the query as sent and hold max_results results, so
+        each spelling, size, field projection and context budget of a
+        cached search gets its own body.
+        
+        Args:
+            cache_key: Key of the cached response the body renders
+            query: Query as sent by the client
+            max_results: Number of results in the body
+            fields: Projected fields, as returned by parse_fields
+            context_budget: Context budget in characters
+            
+        Returns:
+            Cache key string
+        """
+        digest = hashlib.sha1(query.encode('utf-8')).hexdigest()[:16]
+        body_key = f"body:{cache_key}:{max_results}:{digest}"
+        if fields:
+            body_key += f":{','.join(fields)}"
+        if context_budget is not None:
+            body_key += f":ctx{context_budget}"
+        return body_key
+    
+    def get_body(self, body_key: str) -> Optional[dict]:
+        """
+        Get a rendered response body while the response it renders is fresh
+        
+        Stale bodies are not returned: the caller falls back to the
+        response entry, which may have been refreshed in the meantime.
+        
+        Args:
+            body_key: Body cache key
+            
+        Returns:
+            Rendered body dict (see utils.response_body) or None
+        """
+        return self._as_fresh_body(self._get_entry(body_key))
+    
+    async def get_body_async(self, body_key: str) -> Optional[dict]:
+        """
+        Coroutine version of get_body, reading Redis on async_redis
+        
+        Args:
+            body_key: Body cache key
+            
+        Returns:
+            Same as get_body
+        """
+        return self._as_fresh_body(await self._get_entry_async(body_key))
+    
+    @staticmethod
+    def _as_fresh_body(entry: Optional[dict]) -> Optional[dict]:
+        """Return a body entry's value while fresh, counting it as a hit"""
+        if entry is None or time.time() >= entry['fresh_until']:
+            return None
+        if entry.get('negative_cached'):
+            metrics.CACHE_LOOKUPS.labels('negative').inc()
+            metrics.NEGATIVE_CACHE.labels('response', 'empty', 'hit').inc()
+        else:
+            metrics.CACHE_LOOKUPS.labels('hit').inc()
+        return entry['value']
+    
+    def set_body(self, body_key: str, rendered: dict, fresh_until: float, negative_cached: bool = False) -> bool:
+        """
+        Store a rendered response body for as long as its response is fresh
+        
+        Args:
+            body_key: Body cache key
+            rendered: Rendered body dict
+            fresh_until: Soft expiry of the response it renders
+            negative_cached: Whether it renders a cached empty response
+            
+        Returns:
+            True if successful
+        """
+        timeout = int(fresh_until - time.time())
+        if timeout <= 0:
             return False
+        entry = {'value': rendered, 'fresh_until': fresh_until, 'expires_at': fresh_until}
+        if negative_cached:
+            entry['negative_cached'] = True
+        
+        # Already bytes, so stored as is rather than through the codec
+        return self._set_entry(body_key, entry, timeout, encode=False)
+    
+    def get_engine_key(self, engine_name: str, query: str) -> str:
+        """
+        Generate per-engine result cache key
+        
+        Args:
+            engine_name: Engine name
+            query: Search query
+            
+        Returns:
+            Cache key string
+        """
+        return f"engine:{engine_name}:{normalize_query(query)}"
+    
+    def get_engine_results(
+        self,
+        engine_name: str,
+        query: str,
+        num_results: int
+    ) -> Optional[EngineResults]:
+        """
+        Get one engine's cached outcome for a query
+        
+        A cached failure is returned whatever num_results is, so the engine
+        is not retried until it expires.
+        
+        Args:
+            engine_name: Engine name
+            query: Search query
+            num_results: Number of results the caller needs
+            
+        Returns:
+            EngineResults with cached set, and negative_cached for empty
+            results or a failure, or None if not cached with at least
+            num_results requested
+        """
+        entry = self._get_entry(self.get_engine_key(engine_name, query))
+        if entry is None:
+            return None
+        value = entry['value']
+        
+        if value.get('error'):
+            metrics.NEGATIVE_CACHE.labels('engine', 'error', 'hit').inc()
+            return EngineResults(engine=engine_name, error=value['error'], cached=True, negative_cached=True)
+        if value['num_results'] < num_results:
+            return None
+        
+        results = [SearchResult(**r) for r in value['results'][:num_results]]
+        if not results:
+            metrics.NEGATIVE_CACHE.labels('engine', 'empty', 'hit').inc()
+        return EngineResults(engine=engine_name, results=results, cached=True, negative_cached=not results)
+    
+    def set_engine_results(
+        self,
+        engine_name: str,
+        query: str,
+        results: List[SearchResult],
+        num_results: int,
+        timeout: int = 300
+    ) -> bool:
+        """
+        Store one engine's parsed results for a query
+        
+        Args:
+            engine_name: Engine name
+            query: Search query
+            results: Parsed SearchResult objects
+            num_results: Number of results that were requested upstream
+            timeout: Cache timeout in seconds
+            
+        Returns:
+            True if successful
+        """
+        if not results:
+            metrics.NEGATIVE_CACHE.labels('engine', 'empty', 'store').inc()
+        entry = {
+            'value': {
+                'num_results': num_results,
+                'results': [r.to_dict() for r in results]
+            },
+            'fresh_until': time.time() + timeout,
+            'expires_at': time.time() + timeout
+        }
+        return self._set_entry(self.get_engine_key(engine_name, query), entry, timeout)
+    
+    def set_engine_error(self, engine_name: str, query: str, error: str, timeout: int) -> bool:
+        """
+        Remember that an engine failed for a query, so it is not retried
+        
+        Args:
+            engine_name: Engine name
+            query: Search query
+            error: Error message to serve until it expires
+            timeout: Cache timeout in seconds
+            
+        Returns:
+            True if successful
+        """
+        metrics.NEGATIVE_CACHE.labels('engine', 'error', 'store').inc()
+        entry = {
+            'value': {
+                'num_results': 0,
+                'results': [],
+                'error': error
+            },
+            'fresh_until': time.time() + timeout,
+            'expires_at': time.time() + timeout
+        }
+        return self._set_entry(self.get_engine_key(engine_name, query), entry, timeout)
+    
+    def get_redis_client(self):
+        """
+        Get the raw Redis client behind the cache
+        
+        Returns:
+            Redis client, or None for non-Redis cache backends
+        """
+        return getattr(self.cache.cache, '_write_client', None)
     
     def clear(self) -> bool:
         """
@@ -66,12 +443,51 @@ class CacheService:
         Returns:
             True if successful
         """
+        if self.memory_cache is not None:
+            self.memory_cache.clear()
+        if self.shared_cache is not None:
+            self.shared_cache.clear()
+        
         try:
             self.cache.clear()
-            return True
         except Exception as e:
             print(f"Cache clear error: {str(e)}")
             return False
+        
+        self._publish_invalidation('*')
+        return True
+    
+    def get_stats(self) -> dict:
+        """
+        Get hit and miss counts per cache tier
+        
+        Returns:
+            Stats dict, including L1 and shared memory occupancy when enabled
+        """
+        stats = dict(self.stats)
+        if self.memory_cache is not None:
+            stats['l1'] = self.memory_cache.stats()
+        if self.shared_cache is not None:
+            stats['shm'] = self.shared_cache.stats()
+        return stats
+    
+    def ping(self) -> dict:
+        """
+        Check the cache backend is reachable with one round trip
+        
+        Returns:
+            Dict with 'ok', the round trip in ms and any error
+        """
+        started = time.perf_counter()
+        try:
+            redis_client = self.get_redis_client()
+            if redis_client is not None:
+                redis_client.ping()
+            else:
+                self.cache.get('polypop:ping')
+        except Exception as e:
+            return {'ok': False, 'error': str(e) or type(e).__name__}
+        return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
     
     def test(self) -> dict:
         """
@@ -97,4 +513,223 @@ class CacheService:
             return {
                 'error': str(e),
                 'cache_backend_class': str(type(self.cache.cache).__name__)
-            }
\ No newline at end of file
+            }
+    
+    def _count(self, tier: str, result: str):
+        """Count a tier read as 'hit' or 'miss'"""
+        self.stats[f"{tier}_hits" if result == 'hit' else f"{tier}_misses"] += 1
+        metrics.CACHE_TIER_REQUESTS.labels(tier, result).inc()
+    
+    @staticmethod
+    def _count_lookup(found: Tuple[Optional[dict], bool]) -> Tuple[Optional[dict], bool]:
+        """Count a response lookup as hit, stale, negative or miss"""
+        value, stale = found
+        if value is None:
+            result = 'miss'
+        elif value.get('negative_cached'):
+            result = 'negative'
+            metrics.NEGATIVE_CACHE.labels('response', 'empty', 'hit').inc()
+        else:
+            result = 'stale' if stale else 'hit'
+        metrics.CACHE_LOOKUPS.labels(result).inc()
+        return found
+    
+    @staticmethod
+    def _unwrap(entry: Optional[dict]) -> Tuple[Optional[dict], bool]:
+        """Split a response entry into its value and staleness"""
+        if entry is None:
+            return None, False
+        
+        # Entries written before soft TTLs existed are plain response dicts
+        if 'fresh_until' not in entry:
+            return dict(entry), False
+        
+        # Shallow copy so callers can flag the response without touching L1
+        return dict(entry['value']), time.time() >= entry['fresh_until']
+    
+    def _get_memory_entry(self, cache_key: str) -> Optional[dict]:
+        """Read an entry from L1 only"""
+        if self.memory_cache is None:
+            return None
+        entry = self.memory_cache.get(cache_key)
+        if entry is None:
+            self._count('l1', 'miss')
+        else:
+            self._count('l1', 'hit')
+        return entry
+    
+    def _get_shared_entry(self, cache_key: str) -> Optional[dict]:
+        """Read and decode an entry from the shared memory tier, filling L1"""
+        if self.shared_cache is None:
+            return None
+        try:
+            raw = self.shared_cache.get(cache_key)
+            entry = self._decode(cache_key, pickle.loads(raw)) if raw is not None else None
+        except Exception as e:
+            print(f"Shared cache get error: {str(e)}")
+            entry = None
+        
+        if entry is None:
+            self._count('shm', 'miss')
+            return None
+        self._count('shm', 'hit')
+        self._fill_memory(cache_key, entry)
+        return entry
+    
+    def _add_shared_entry(self, cache_key: str, entries: dict) -> bool:
+        """Add a shared memory entry to entries if there is one"""
+        entry = self._get_shared_entry(cache_key)
+        if entry is None:
+            return False
+        entries[cache_key] = entry
+        return True
+    
+    def _fill_shared(self, cache_key: str, stored, expires_at: Optional[float]):
+        """Copy a value as stored in Redis into the shared tier until its hard TTL"""
+        # Entries written before hard TTLs existed have no known expiry
+        if self.shared_cache is None or expires_at is None:
+            return
+        timeout = expires_at - time.time()
+        try:
+            self.shared_cache.set(cache_key, pickle.dumps(stored, pickle.HIGHEST_PROTOCOL), timeout)
+        except Exception as e:
+            print(f"Shared cache set error: {str(e)}")
+    
+    def _fill_memory(self, cache_key: str, entry: dict):
+        """Copy an entry read from Redis into L1, never past its hard TTL"""
+        if self.memory_cache is None:
+            return
+        timeout = self.memory_cache.default_timeout
+        if 'expires_at' in entry:
+            timeout = min(timeout, entry['expires_at'] - time.time())
+        if timeout > 0:
+            self.memory_cache.set(cache_key, entry, timeout)
+    
+    def _get_entry(self, cache_key: str) -> Optional[dict]:
+        """Read an entry from L1, then shared memory, then Redis, filling the tiers above"""
+        entry = self._get_memory_entry(cache_key) or self._get_shared_entry(cache_key)
+        if entry is not None:
+            return entry
+        
+        try:
+            stored = self.cache.get(cache_key)
+        except Exception as e:
+            print(f"Cache get error: {str(e)}")
+            return None
+        return self._accept_l2(cache_key, stored)
+    
+    async def _get_entry_async(self, cache_key: str) -> Optional[dict]:
+        """_get_entry with the Redis read on async_redis when it is set"""
+        entry = self._get_memory_entry(cache_key) or self._get_shared_entry(cache_key)
+        if entry is not None:
+            return entry
+        
+        try:
+            if self.async_redis is None:
+                # Non-Redis backends live in this process and do not block
+                stored = self.cache.get(cache_key)
+            else:
+                backend = self.cache.cache
+                stored = backend.serializer.loads(
+                    await self.async_redis.get(f"{backend._get_prefix()}{cache_key}")
+                )
+        except Exception as e:
+            print(f"Cache get error: {str(e)}")
+            return None
+        return self._accept_l2(cache_key, stored)
+    
+    def _accept_l2(self, cache_key: str, stored) -> Optional[dict]:
+        """Decode a value read from Redis, count the read and fill the tiers above"""
+        entry = self._decode(cache_key, stored)
+        if entry is None:
+            self._count('l2', 'miss')
+            return None
+        self._count('l2', 'hit')
+        
+        self._fill_shared(cache_key, stored, entry.get('expires_at'))
+        self._fill_memory(cache_key, entry)
+        return entry
+    
+    def _decode(self, cache_key: str, stored) -> Optional[dict]:
+        """Decode an entry read from Redis; undecodable entries count as misses"""
+        if stored is None:
+            return None
+        try:
+            return self.codec.decode(stored)
+        except Exception as e:
+            print(f"Cache decode error for {cache_key}: {str(e)}")
+            return None
+    
+    def _set_entry(self, cache_key: str, entry: dict, timeout: int, encode: bool = True) -> bool:
+        """Write an entry to every tier and invalidate other workers' L1"""
+        if self.memory_cache is not None:
+            self.memory_cache.set(cache_key, entry, min(self.memory_cache.default_timeout, timeout))
+        
+        try:
+            stored = self.codec.encode(entry) if encode and self.payload_format == 'compact' else entry
+            self._fill_shared(cache_key, stored, time.time() + timeout)
+            self.cache.set(cache_key, stored, timeout=timeout)
+        except Exception as e:
+            print(f"Cache set error: {str(e)}")
+            return False
+        
+        self._publish_invalidation(cache_key)
+        return True
+    
+    def _has_local_tiers(self) -> bool:
+        """Whether entries are kept anywhere other workers' writes do not reach"""
+        return self.memory_cache is not None or self.shared_cache is not None
+    
+    def _publish_invalidation(self, cache_key: str):
+        """Tell other workers to drop a key ('*' for all) from their L1 and shared memory"""
+        redis_client = self.get_redis_client()
+        if not self._has_local_tiers() or redis_client is None:
+            return
+        try:
+            redis_client.publish(
+                self.invalidation_channel,
+                f"{self._origin}|{self._shared_origin}|{cache_key}"
+            )
+        except Exception as e:
+            print(f"Cache invalidation publish error: {str(e)}")
+    
+    def _listen_for_invalidations(self):
+        """Apply L1 and shared memory invalidations published by other workers"""
+        while True:
+            try:
+                pubsub = self.get_redis_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.invalidation_channel)
+                for message in pubsub.listen():
+                    data = message.get('data')
+                    if isinstance(data, bytes):
+                        data = data.decode('utf-8', 'replace')
+                    origin, _, rest = str(data).partition('|')
+                    shared_origin, _, cache_key = rest.partition('|')
+                    if origin == self._origin:
+                        continue
+                    # Writers on this host already updated the shared file
+                    self._invalidate_local(cache_key, shared_origin != self._shared_origin)
+            except Exception as e:
+                print(f"Cache invalidation listener error: {str(e)}")
+            
+            # Entries may have changed while we were disconnected
+            self._invalidate_local('*', True)
+            time.sleep(5)
+    
+    def _invalidate_local(self, cache_key: str, shared: bool):
+        """Drop a key ('*' for all) from L1, and from shared memory if shared"""
+        if self.memory_cache is not None:
+            if cache_key == '*':
+                self.memory_cache.clear()
+            else:
+                self.memory_cache.delete(cache_key)
+        
+        if self.shared_cache is None or not shared:
+            return
+        try:
+            if cache_key == '*':
+                self.shared_cache.clear()
+            else:
+                self.shared_cache.delete(cache_key)
+        except Exception as e:
+            print(f"Shared cache invalidation error: {str(e)}")
\ No newline at end of file
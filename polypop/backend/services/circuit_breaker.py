@@ -0,0 +1,348 @@
+"""
+Per-engine circuit breaker shared across workers
+"""
+import asyncio
+import functools
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Optional
+
+from services.single_flight import RELEASE_SCRIPT
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Outcomes kept in the rolling window
+OK = 'ok'
+EMPTY = 'empty'
+ERROR = 'error'
+TIMEOUT = 'timeout'
+
+# allow_request verdict: the half-open probe is ours if the lease is free
+PROBE = 'probe'
+
+
+class CircuitBreaker:
+    """
+    Stop calling an engine that keeps failing, then probe it after a cooldown
+    
+    Each worker tracks a rolling window of the engine's outcomes. When the
+    error/timeout rate or the empty-page rate (captchas, layout changes)
+    crosses its threshold the breaker opens, and the open-until time is
+    written to Redis so every worker skips the engine. After the cooldown
+    one worker in the fleet takes a probe lease and lets a single request
+    through: success closes the breaker everywhere, failure reopens it.
+    
+    Redis is never called while the lock is held. The *_async methods
+    run the Redis calls on an executor, so they do not stall the event
+    loop; state changes are decided locally and written behind.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        redis_client=None,
+        window: int = 20,
+        min_requests: int = 10,
+        error_rate: float = 0.5,
+        empty_rate: float = 0.8,
+        cooldown: float = 30,
+        sync_interval: float = 1.0
+    ):
+        self.name = name
+        self.redis = redis_client
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.empty_rate = empty_rate
+        self.cooldown = cooldown
+        self.sync_interval = sync_interval
+        
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_until = 0.0
+        self._probe_token: Optional[str] = None
+        self._probing = False
+        self._synced_at = 0.0
+        self._trips = 0
+        self._rejected = 0
+    
+    @property
+    def state(self) -> str:
+        """Current state: 'closed', 'open' or 'half_open'"""
+        if self._sync_due():
+            self._pull_state()
+        with self._lock:
+            if self._state == OPEN and time.time() >= self._opened_until:
+                return HALF_OPEN
+            return self._state
+    
+    def allow_request(self) -> bool:
+        """
+        Check whether a request to the engine may be sent
+        
+        Returns:
+            True if closed, or if this caller won the half-open probe
+        """
+        if self._sync_due():
+            self._pull_state()
+        verdict = self._admit()
+        if verdict is not PROBE:
+            return verdict
+        return self._start_probe(self._acquire_probe())
+    
+    async def allow_request_async(self, executor: Executor = None) -> bool:
+        """
+        allow_request with the Redis calls on an executor
+        
+        Args:
+            executor: Executor for Redis calls, default the loop's
+        
+        Returns:
+            True if closed, or if this caller won the half-open probe
+        """
+        loop = asyncio.get_running_loop()
+        if self._sync_due():
+            await loop.run_in_executor(executor, self._pull_state)
+        verdict = self._admit()
+        if verdict is not PROBE:
+            return verdict
+        try:
+            token = await loop.run_in_executor(executor, self._acquire_probe)
+        except asyncio.CancelledError:
+            # A lease taken regardless expires with the cooldown
+            self._start_probe(None)
+            raise
+        return self._start_probe(token)
+    
+    def record_success(self, result_count: int):
+        """
+        Record a completed request
+        
+        Args:
+            result_count: Number of results parsed from the page
+        """
+        self._write(self._on_success(result_count))
+    
+    async def record_success_async(self, result_count: int, executor: Executor = None):
+        """record_success with the Redis calls on an executor"""
+        await self._write_async(self._on_success(result_count), executor)
+    
+    def record_failure(self, timed_out: bool = False):
+        """
+        Record a failed request
+        
+        Args:
+            timed_out: The request exceeded the engine's timeout rather than erroring
+        """
+        self._write(self._on_failure(timed_out))
+    
+    async def record_failure_async(self, timed_out: bool = False, executor: Executor = None):
+        """record_failure with the Redis calls on an executor"""
+        await self._write_async(self._on_failure(timed_out), executor)
+    
+    def abandon(self):
+        """Give up a probe whose request was cancelled before it finished"""
+        self._write(self._on_abandon())
+    
+    async def abandon_async(self, executor: Executor = None):
+        """abandon with the Redis calls on an executor"""
+        await self._write_async(self._on_abandon(), executor)
+    
+    def get_stats(self) -> dict:
+        """
+        Get breaker state and recent outcome rates
+        
+        Returns:
+            Dict with state, rates over the window and trip counts
+        """
+        state = self.state
+        with self._lock:
+            total = len(self._outcomes)
+            errors = sum(1 for outcome in self._outcomes if outcome in (ERROR, TIMEOUT))
+            timeouts = sum(1 for outcome in self._outcomes if outcome == TIMEOUT)
+            empties = sum(1 for outcome in self._outcomes if outcome == EMPTY)
+            return {
+                'state': state,
+                'window': total,
+                'error_rate': round(errors / total, 3) if total else 0.0,
+                'timeout_rate': round(timeouts / total, 3) if total else 0.0,
+                'empty_rate': round(empties / total, 3) if total else 0.0,
+                'retry_in_s': round(max(0.0, self._opened_until - time.time()), 1) if state != CLOSED else 0.0,
+                'trips': self._trips,
+                'rejected': self._rejected
+            }
+    
+    def _admit(self):
+        """Decide on a request from local state: True, False or PROBE"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._probe_token is not None or self._probing or time.time() < self._opened_until:
+                self._rejected += 1
+                return False
+            self._probing = True
+            return PROBE
+    
+    def _start_probe(self, token: Optional[str]) -> bool:
+        """Finish claiming the probe once the fleet-wide lease is known"""
+        with self._lock:
+            self._probing = False
+            if token is None:
+                self._rejected += 1
+                return False
+            self._probe_token = token
+            self._state = HALF_OPEN
+            return True
+    
+    def _on_success(self, result_count: int) -> Optional[Callable[[], None]]:
+        """Apply a completed request locally, returning any Redis write"""
+        outcome = OK if result_count > 0 else EMPTY
+        with self._lock:
+            if self._probe_token is not None:
+                return self._close() if outcome == OK else self._open()
+            return self._record(outcome)
+    
+    def _on_failure(self, timed_out: bool) -> Optional[Callable[[], None]]:
+        """Apply a failed request locally, returning any Redis write"""
+        with self._lock:
+            if self._probe_token is not None:
+                return self._open()
+            return self._record(TIMEOUT if timed_out else ERROR)
+    
+    def _on_abandon(self) -> Optional[Callable[[], None]]:
+        """Drop a cancelled probe locally, returning the lease release"""
+        with self._lock:
+            if self._probe_token is None:
+                return None
+            token, self._probe_token = self._probe_token, None
+            self._state = OPEN
+            return functools.partial(self._release_probe, token)
+    
+    @staticmethod
+    def _write(write: Optional[Callable[[], None]]):
+        if write is not None:
+            write()
+    
+    @staticmethod
+    async def _write_async(write: Optional[Callable[[], None]], executor: Executor = None):
+        if write is not None:
+            await asyncio.get_running_loop().run_in_executor(executor, write)
+    
+    def _record(self, outcome: str) -> Optional[Callable[[], None]]:
+        """Add an outcome while closed and trip if a threshold is crossed; caller holds the lock"""
+        self._outcomes.append(outcome)
+        if self._state != CLOSED or len(self._outcomes) < self.min_requests:
+            return None
+        
+        total = len(self._outcomes)
+        errors = sum(1 for o in self._outcomes if o in (ERROR, TIMEOUT))
+        empties = sum(1 for o in self._outcomes if o == EMPTY)
+        if errors / total >= self.error_rate or empties / total >= self.empty_rate:
+            print(f"🔌 {self.name} circuit OPEN ({errors}/{total} failed, {empties}/{total} empty)")
+            return self._open()
+        return None
+    
+    def _open(self) -> Callable[[], None]:
+        """Open the breaker for a cooldown; caller holds the lock and runs the returned write"""
+        token, self._probe_token = self._probe_token, None
+        self._state = OPEN
+        self._opened_until = time.time() + self.cooldown
+        self._trips += 1
+        self._outcomes.clear()
+        return functools.partial(self._push_state, token, self._opened_until)
+    
+    def _close(self) -> Callable[[], None]:
+        """Close the breaker after a successful probe; caller holds the lock and runs the returned write"""
+        print(f"🔌 {self.name} circuit CLOSED")
+        token, self._probe_token = self._probe_token, None
+        self._state = CLOSED
+        self._opened_until = 0.0
+        self._outcomes.clear()
+        return functools.partial(self._push_state, token, None)
+    
+    def _push_state(self, token: Optional[str], opened_until: Optional[float]):
+        """Tell other workers the breaker opened (until opened_until) or closed"""
+        self._release_probe(token)
+        if self.redis is None:
+            return
+        try:
+            if opened_until is None:
+                self.redis.delete(self._state_key())
+            else:
+                # Outlive the cooldown so late workers still see the trip
+                self.redis.set(self._state_key(), repr(opened_until), ex=int(self.cooldown * 10))
+        except Exception as e:
+            print(f"Circuit breaker sync error: {str(e)}")
+    
+    def _sync_due(self) -> bool:
+        """Whether the fleet-wide state should be pulled, claiming the pull if so"""
+        if self.redis is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._synced_at < self.sync_interval:
+                return False
+            self._synced_at = now
+            return True
+    
+    def _pull_state(self):
+        """Adopt the fleet-wide state from Redis"""
+        try:
+            value = self.redis.get(self._state_key())
+        except Exception as e:
+            print(f"Circuit breaker sync error: {str(e)}")
+            return
+        
+        with self._lock:
+            if self._probe_token is not None or self._probing:
+                return
+            if value is None:
+                if self._state != CLOSED:
+                    self._state = CLOSED
+                    self._opened_until = 0.0
+                    self._outcomes.clear()
+                return
+            opened_until = float(value)
+            if self._state == CLOSED or opened_until > self._opened_until:
+                self._state = OPEN
+                self._opened_until = opened_until
+    
+    def _acquire_probe(self) -> Optional[str]:
+        """
+        Take the fleet-wide probe lease
+        
+        Returns:
+            Lease token (empty when there is no Redis to lease from),
+            or None if another worker is probing
+        """
+        if self.redis is None:
+            return ''
+        
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis.set(self._probe_key(), token, nx=True, px=int(self.cooldown * 1000))
+        except Exception as e:
+            print(f"Circuit breaker probe error: {str(e)}")
+            return ''
+        return token if acquired else None
+    
+    def _release_probe(self, token: Optional[str]):
+        """Release a probe lease taken by _acquire_probe"""
+        if not token:
+            return
+        try:
+            self.redis.eval(RELEASE_SCRIPT, 1, self._probe_key(), token)
+        except Exception as e:
+            print(f"Circuit breaker release error: {str(e)}")
+    
+    def _state_key(self) -> str:
+        return f"breaker:{self.name}"
+    
+    def _probe_key(self) -> str:
+        return f"breaker:{self.name}:probe"
\ No newline at end of file
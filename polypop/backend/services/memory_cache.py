@@ -0,0 +1,118 @@
+"""
+Bounded in-process LRU/TTL cache
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class MemoryCache:
+    """Thread-safe LRU cache bounded by entry count and approximate size"""
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_timeout: int = 60
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_timeout = default_timeout
+        
+        self._lock = threading.Lock()
+        # key -> (value, expires_at, size), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a live entry and mark it recently used
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            value, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, timeout: float = None, size: int = None):
+        """
+        Store an entry, evicting least recently used ones to stay in bounds
+        
+        Args:
+            key: Cache key
+            value: Value to store
+            timeout: TTL in seconds (defaults to default_timeout)
+            size: Size in bytes (estimated from the pickled value if omitted)
+        """
+        if size is None:
+            size = self._estimate_size(value)
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+        
+        expires_at = time.monotonic() + (timeout if timeout is not None else self.default_timeout)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+    
+    def delete(self, key: str):
+        """Remove an entry if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> dict:
+        """
+        Get current occupancy
+        
+        Returns:
+            Dict with entry count and approximate bytes held
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
+    
+    def _remove(self, key: str):
+        """Remove an entry; caller must hold the lock"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+    
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Approximate in-memory size from the pickled length"""
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        try:
+            return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return 0
\ No newline at end of file
@@ -1,30 +1,119 @@
 """
 Search service for orchestrating multi-engine searches
 """
-from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Iterator, List, Dict, Optional, Tuple, TypeVar
 
-from engines.base import BaseSearchEngine
-from engines.duckduckgo import DuckDuckGoEngine
-from engines.bing import BingEngine
-from models.search_result import SearchResult, SearchResponse
-from utils.ranking import merge_and_rank_results
+from engines.registry import EngineRegistry
+from models.search_result import EngineResults, SearchResult, SearchResponse
+from services.cache_service import CacheService
+from services.circuit_breaker import CircuitBreaker
+from services.upstream_scheduler import PRIORITIES, UpstreamScheduler
+from utils import metrics
+from utils.ranking import RANKERS, merge_and_rank_results
 from utils.formatters import format_search_response, format_empty_response
 
+# Engine modules pull in aiohttp, requests and bs4; they load with the first engine
+if TYPE_CHECKING:
+    from engines.base import BaseSearchEngine
+
+T = TypeVar('T')
+
 
 class SearchService:
     """Service for managing search operations"""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, cache_service: Optional[CacheService] = None):
         self.timeout = config.get('REQUEST_TIMEOUT', 10)
         self.user_agent = config.get('USER_AGENT')
-        self.thread_pool_size = config.get('THREAD_POOL_SIZE', 2)
         
-        # Initialize search engines
-        self.engines: Dict[str, BaseSearchEngine] = {
-            'duckduckgo': DuckDuckGoEngine(self.timeout, self.user_agent),
-            'bing': BingEngine(self.timeout, self.user_agent)
+        # Per-engine result cache, shared by every engine combination
+        self.cache_service = cache_service
+        self.engine_cache_timeout = config.get('ENGINE_CACHE_DEFAULT_TIMEOUT', 300)
+        self.engine_cache_timeouts = config.get('ENGINE_CACHE_TIMEOUTS', {})
+        self.negative_empty_timeout = config.get('NEGATIVE_CACHE_EMPTY_TIMEOUT', 60)
+        self.negative_error_timeout = config.get('NEGATIVE_CACHE_ERROR_TIMEOUT', 15)
+        
+        # Ranking engine and per-engine prior weights
+        self.ranker = config.get('RANKER', 'term_frequency')
+        if self.ranker not in RANKERS:
+            raise ValueError(f"Unknown ranker: {self.ranker}")
+        self.engine_weights = config.get('RANKER_ENGINE_WEIGHTS', {})
+        
+        # Per-request latency budget and hedging of slow engines
+        self.deadline_ms = config.get('SEARCH_DEADLINE_MS', 0)
+        self.hedge_enabled = config.get('HEDGE_ENABLED', False)
+        self.hedge_percentile = config.get('HEDGE_PERCENTILE', 95)
+        self.hedge_min_samples = config.get('HEDGE_MIN_SAMPLES', 20)
+        
+        # Searches in flight across all batch requests; the semaphore is
+        # created on the event loop the first time a batch runs
+        self.batch_concurrency = config.get('BATCH_CONCURRENCY', 8)
+        self._batch_semaphore: Optional[asyncio.Semaphore] = None
+        self._batch_waiting = 0
+        
+        # Result pages are parsed on these threads, so the event loop keeps
+        # serving other searches while one page is being parsed
+        self.parse_executor = ThreadPoolExecutor(
+            max_workers=config.get('PARSE_POOL_SIZE', 4),
+            thread_name_prefix='engine-parse'
+        )
+        
+        # Settings shared by every engine: timeouts, pooled keep-alive HTTP, parser
+        engine_options = {
+            'timeout': self.timeout,
+            'user_agent': self.user_agent,
+            'pool_size': config.get('HTTP_POOL_SIZE', 10),
+            'keepalive_timeout': config.get('HTTP_KEEPALIVE_TIMEOUT', 30),
+            'max_retries': config.get('HTTP_MAX_RETRIES', 2),
+            'retry_backoff': config.get('HTTP_RETRY_BACKOFF', 0.3),
+            'parser': config.get('PARSER_BACKEND', 'html.parser'),
+            'parse_executor': self.parse_executor
         }
+        
+        # Event loop shared by all async searches, started on first use
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        
+        # Enabled engines, imported and constructed on first use
+        self.engines = EngineRegistry(
+            config.get('ENABLED_ENGINES', ['duckduckgo', 'bing']),
+            config.get('ENGINE_URLS', {}),
+            **engine_options
+        )
+        
+        # Circuit breaker per engine, tripped fleet-wide through Redis
+        redis_client = cache_service.get_redis_client() if cache_service else None
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(
+                name,
+                redis_client,
+                window=config.get('BREAKER_WINDOW', 20),
+                min_requests=config.get('BREAKER_MIN_REQUESTS', 10),
+                error_rate=config.get('BREAKER_ERROR_RATE', 0.5),
+                empty_rate=config.get('BREAKER_EMPTY_RATE', 0.8),
+                cooldown=config.get('BREAKER_COOLDOWN', 30),
+                sync_interval=config.get('BREAKER_SYNC_INTERVAL', 1.0)
+            )
+            for name in self.engines
+        }
+        
+        # Every upstream request from this worker queues here, under one
+        # concurrency cap and an adaptive rate limit per engine
+        self.scheduler = UpstreamScheduler(
+            self.engines,
+            max_concurrency=config.get('UPSTREAM_MAX_CONCURRENCY', 16),
+            rates=config.get('ENGINE_RATE_LIMITS', {}),
+            default_rate=config.get('ENGINE_RATE_DEFAULT', 5.0),
+            burst=config.get('ENGINE_RATE_BURST', 10),
+            min_rate=config.get('ENGINE_RATE_MIN', 0.2),
+            increase=config.get('ENGINE_RATE_INCREASE', 0.05),
+            decrease=config.get('ENGINE_RATE_DECREASE', 0.5)
+        )
     
     def search_sequential(
         self,
@@ -47,58 +136,609 @@ class SearchService:
         
         for engine_name in engine_names:
             engine = self.engines.get(engine_name)
-            if engine:
-                results = engine.search(query, max_results)
+            if engine and self.breakers[engine_name].allow_request():
+                # The slot is held on the event loop that owns the scheduler,
+                # so a 429/503 adapts the engine's rate as on the async paths
+                try:
+                    results = self.run_async(self._fetch_scheduled(engine, query, max_results, 'interactive'))
+                except Exception as e:
+                    self.breakers[engine_name].record_failure(timed_out=isinstance(e, asyncio.TimeoutError))
+                    print(f"{engine_name} search failed: {str(e) or type(e).__name__}")
+                    continue
+                self.breakers[engine_name].record_success(len(results))
+                metrics.ENGINE_RESULTS.labels(engine_name).observe(len(results))
+                all_results.extend(results)
+        
+        return self._rank_sequential(query, all_results, max_results)
+    
+    async def search_sequential_async(
+        self,
+        query: str,
+        engine_names: List[str],
+        max_results: int
+    ) -> SearchResponse:
+        """
+        Execute search one engine at a time without blocking the event loop
+        
+        Same behaviour as search_sequential, for async request handlers.
+        Must run on the shared event loop.
+        
+        Args:
+            query: Search query
+            engine_names: List of engine names to use
+            max_results: Maximum results to return
+            
+        Returns:
+            SearchResponse object
+        """
+        all_results = []
+        
+        for engine_name in engine_names:
+            engine = self.engines.get(engine_name)
+            if engine and await self.breakers[engine_name].allow_request_async():
+                try:
+                    async with self.scheduler.slot(engine_name):
+                        results = await engine.fetch_results_async(query, max_results)
+                except Exception as e:
+                    await self.breakers[engine_name].record_failure_async(timed_out=isinstance(e, asyncio.TimeoutError))
+                    print(f"{engine_name} search failed: {str(e) or type(e).__name__}")
+                    continue
+                await self.breakers[engine_name].record_success_async(len(results))
+                metrics.ENGINE_RESULTS.labels(engine_name).observe(len(results))
                 all_results.extend(results)
         
+        return self._rank_sequential(query, all_results, max_results)
+    
+    def _rank_sequential(self, query: str, all_results: List[SearchResult], max_results: int) -> SearchResponse:
+        """Rank the results of a sequential search into a response"""
         if not all_results:
             return format_empty_response(query)
         
-        ranked_results = merge_and_rank_results(all_results, query, max_results)
+        ranked_results = merge_and_rank_results(
+            all_results, query, max_results, self.ranker, self.engine_weights
+        )
         return format_search_response(query, ranked_results)
     
     def search_parallel(
         self,
         query: str,
         engine_names: List[str],
-        max_results: int
+        max_results: int,
+        use_cache: bool = False,
+        deadline_ms: Optional[int] = None,
+        hedge: Optional[bool] = None,
+        priority: str = 'interactive'
     ) -> SearchResponse:
         """
         Execute search in parallel (multiple engines simultaneously)
         
+        Blocking wrapper around search_async for WSGI request handlers.
+        
         Args:
             query: Search query
             engine_names: List of engine names to use
             max_results: Maximum results to return
+            use_cache: Reuse and store per-engine cached results
+            deadline_ms: Latency budget (defaults to SEARCH_DEADLINE_MS, 0 disables)
+            hedge: Hedge slow engines (defaults to HEDGE_ENABLED)
+            priority: Upstream scheduling priority, one of PRIORITIES
             
         Returns:
             SearchResponse object
         """
-        all_results = []
+        return self.run_async(
+            self.search_async(query, engine_names, max_results, use_cache, deadline_ms, hedge, priority)
+        )
+    
+    async def search_async(
+        self,
+        query: str,
+        engine_names: List[str],
+        max_results: int,
+        use_cache: bool = False,
+        deadline_ms: Optional[int] = None,
+        hedge: Optional[bool] = None,
+        priority: str = 'interactive'
+    ) -> SearchResponse:
+        """
+        Execute search concurrently on the event loop
         
-        with ThreadPoolExecutor(max_workers=self.thread_pool_size) as executor:
-            # Submit search tasks
-            future_to_engine = {}
-            for engine_name in engine_names:
-                engine = self.engines.get(engine_name)
-                if engine:
-                    future = executor.submit(engine.search, query, max_results)
-                    future_to_engine[future] = engine_name
+        Args:
+            query: Search query
+            engine_names: List of engine names to use
+            max_results: Maximum results to return
+            use_cache: Reuse and store per-engine cached results
+            deadline_ms: Latency budget (defaults to SEARCH_DEADLINE_MS, 0 disables)
+            hedge: Hedge slow engines (defaults to HEDGE_ENABLED)
+            priority: Upstream scheduling priority, one of PRIORITIES
             
-            # Collect results as they complete
-            for future in as_completed(future_to_engine):
-                engine_name = future_to_engine[future]
-                try:
-                    results = future.result()
-                    all_results.extend(results)
-                except Exception as e:
-                    print(f"{engine_name} search failed: {str(e)}")
+        Returns:
+            SearchResponse object
+        """
+        outcomes = {}
+        async for outcome in self.iter_engine_results(
+            query, engine_names, max_results, use_cache, deadline_ms, hedge, priority
+        ):
+            outcomes[outcome.engine] = outcome
+        
+        # Merge in request order so ranking ties do not depend on timing
+        return self.build_response(
+            query,
+            [outcomes[name] for name in engine_names if name in outcomes],
+            max_results
+        )
+    
+    def stream_engine_results(
+        self,
+        query: str,
+        engine_names: List[str],
+        max_results: int,
+        use_cache: bool = False,
+        deadline_ms: Optional[int] = None,
+        hedge: Optional[bool] = None
+    ) -> Iterator[EngineResults]:
+        """
+        Yield each engine's results as soon as they are available
+        
+        Blocking wrapper around iter_engine_results for WSGI streaming
+        responses. Closing the iterator early cancels in-flight fetches.
+        
+        Args:
+            query: Search query
+            engine_names: List of engine names to use
+            max_results: Maximum results per engine
+            use_cache: Reuse and store per-engine cached results
+            deadline_ms: Latency budget (defaults to SEARCH_DEADLINE_MS, 0 disables)
+            hedge: Hedge slow engines (defaults to HEDGE_ENABLED)
+            
+        Yields:
+            EngineResults in completion order
+        """
+        return self.iter_blocking(
+            self.iter_engine_results(query, engine_names, max_results, use_cache, deadline_ms, hedge)
+        )
+    
+    def stream_batch(
+        self,
+        searches: List[Tuple[str, List[str]]],
+        max_results: int,
+        use_cache: bool = False,
+        deadline_ms: Optional[int] = None,
+        hedge: Optional[bool] = None
+    ) -> Iterator[Tuple[int, SearchResponse]]:
+        """
+        Run many searches, yielding each response as soon as it is ready
+        
+        Blocking wrapper around iter_batch for WSGI request handlers.
+        
+        Args:
+            searches: (query, engine names) pairs
+            max_results: Maximum results per search
+            use_cache: Reuse and store per-engine cached results
+            deadline_ms: Latency budget per search (defaults to SEARCH_DEADLINE_MS, 0 disables)
+            hedge: Hedge slow engines (defaults to HEDGE_ENABLED)
+            
+        Yields:
+            (index into searches, SearchResponse) in completion order
+        """
+        return self.iter_blocking(
+            self.iter_batch(searches, max_results, use_cache, deadline_ms, hedge)
+        )
+    
+    async def iter_batch(
+        self,
+        searches: List[Tuple[str, List[str]]],
+        max_results: int,
+        use_cache: bool = False,
+        deadline_ms: Optional[int] = None,
+        hedge: Optional[bool] = None
+    ) -> AsyncIterator[Tuple[int, SearchResponse]]:
+        """
+        Run many searches concurrently, bounded by BATCH_CONCURRENCY
+        
+        The bound is shared by every batch on this worker, so large offline
+        jobs cannot flood the engines, and their upstream requests queue
+        behind interactive ones. A search's deadline starts once it gets a
+        slot, not while it is queued.
+        
+        Args:
+            searches: (query, engine names) pairs
+            max_results: Maximum results per search
+            use_cache: Reuse and store per-engine cached results
+            deadline_ms: Latency budget per search (defaults to SEARCH_DEADLINE_MS, 0 disables)
+            hedge: Hedge slow engines (defaults to HEDGE_ENABLED)
+            
+        Yields:
+            (index into searches, SearchResponse) in completion order
+        """
+        if self._batch_semaphore is None:
+            self._batch_semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def run(index: int, query: str, engine_names: List[str]) -> Tuple[int, SearchResponse]:
+            self._batch_waiting += 1
+            try:
+                await self._batch_semaphore.acquire()
+            finally:
+                self._batch_waiting -= 1
+            try:
+                return index, await self.search_async(
+                    query, engine_names, max_results, use_cache, deadline_ms, hedge, 'batch'
+                )
+            finally:
+                self._batch_semaphore.release()
+        
+        tasks = [
+            asyncio.ensure_future(run(index, query, engine_names))
+            for index, (query, engine_names) in enumerate(searches)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def iter_blocking(self, agen: AsyncIterator[T]) -> Iterator[T]:
+        """
+        Consume an async generator on the shared event loop from a thread
+        
+        Closing the returned iterator early cancels the generator.
+        
+        Args:
+            agen: Async generator to run
+            
+        Yields:
+            The generator's items
+        """
+        events = queue.Queue()
+        done = object()
+        
+        async def produce():
+            try:
+                async for item in agen:
+                    events.put(item)
+            finally:
+                events.put(done)
+        
+        future = asyncio.run_coroutine_threadsafe(produce(), self._get_loop())
+        try:
+            while True:
+                item = events.get()
+                if item is done:
+                    break
+                yield item
+            future.result()
+        finally:
+            future.cancel()
+    
+    async def iter_engine_results(
+        self,
+        query: str,
+        engine_names: List[str],
+        max_results: int,
+        use_cache: bool = False,
+        deadline_ms: Optional[int] = None,
+        hedge: Optional[bool] = None,
+        priority: str = 'interactive'
+    ) -> AsyncIterator[EngineResults]:
+        """
+        Fetch engines concurrently, yielding each one as it completes
+        
+        With use_cache, engines whose results are already cached for this
+        query are not fetched again, whichever combination cached them.
+        Engines still in flight at the deadline are cancelled and yielded
+        as timed out, so callers can rank whatever arrived in time; their
+        circuit breakers are not told, as only the engine's own timeout
+        counts against it. Engines whose circuit breaker is open are
+        skipped without a request. Time queued in the upstream scheduler
+        counts against the deadline, but engines whose request never left
+        the queue are yielded as queued rather than failed.
+        
+        Args:
+            query: Search query
+            engine_names: List of engine names to use
+            max_results: Maximum results per engine
+            use_cache: Reuse and store per-engine cached results
+            deadline_ms: Latency budget (defaults to SEARCH_DEADLINE_MS, 0 disables)
+            hedge: Hedge slow engines (defaults to HEDGE_ENABLED)
+            priority: Upstream scheduling priority, one of PRIORITIES
+            
+        Yields:
+            EngineResults, cached and skipped engines first, then in
+            completion order, then any engines that missed the deadline
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        started = time.perf_counter()
+        if deadline_ms is None:
+            deadline_ms = self.deadline_ms
+        deadline = started + deadline_ms / 1000 if deadline_ms and deadline_ms > 0 else None
+        hedge = self.hedge_enabled if hedge is None else hedge
+        names = [name for name in engine_names if name in self.engines]
+        use_cache = use_cache and self.cache_service is not None
+        
+        # Cache and breaker state may live in Redis: look them up off the loop
+        if use_cache:
+            cached_outcomes = await asyncio.gather(*(
+                self._run_blocking(self.cache_service.get_engine_results, name, query, max_results)
+                for name in names
+            ))
+        else:
+            cached_outcomes = [None] * len(names)
+        
+        to_fetch = []
+        for name, cached in zip(names, cached_outcomes):
+            if cached is None:
+                engine = self.engines.get(name)
+                if engine is None:
+                    yield EngineResults(
+                        engine=name,
+                        error=f"engine unavailable: {self.engines.get_error(name)}",
+                        elapsed_ms=(time.perf_counter() - started) * 1000
+                    )
+                elif await self.breakers[name].allow_request_async():
+                    to_fetch.append(engine)
+                else:
+                    yield EngineResults(
+                        engine=name,
+                        error='circuit open',
+                        circuit_open=True,
+                        elapsed_ms=(time.perf_counter() - started) * 1000
+                    )
+            else:
+                cached.elapsed_ms = (time.perf_counter() - started) * 1000
+                yield cached
+        
+        # When each engine's request was let out of the upstream queue
+        granted: Dict[str, float] = {}
+        tasks = {
+            asyncio.ensure_future(
+                self._fetch_engine(engine, query, max_results, use_cache, started, granted, hedge, priority)
+            ): engine.name
+            for engine in to_fetch
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    yield task.result()
+            
+            # Deadline reached: give up on the stragglers. Our deadline says
+            # nothing about the engine's health, so the breaker is not told
+            for task in pending:
+                task.cancel()
+                name = tasks[task]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if name not in granted:
+                    # Held back by our own rate limits, not the engine
+                    print(f"{name} was still queued at the {deadline_ms}ms deadline")
+                    yield EngineResults(
+                        engine=name,
+                        error='queued past deadline',
+                        queued=True,
+                        queue_ms=elapsed_ms,
+                        elapsed_ms=elapsed_ms
+                    )
+                    continue
+                print(f"{name} missed the {deadline_ms}ms deadline")
+                yield EngineResults(
+                    engine=name,
+                    error='deadline exceeded',
+                    timed_out=True,
+                    queue_ms=(granted[name] - started) * 1000,
+                    elapsed_ms=elapsed_ms
+                )
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def build_response(
+        self,
+        query: str,
+        outcomes: List[EngineResults],
+        max_results: int
+    ) -> SearchResponse:
+        """
+        Merge and rank per-engine outcomes into one response
+        
+        Args:
+            query: Search query
+            outcomes: EngineResults to merge, in priority order
+            max_results: Maximum results to return
+            
+        Returns:
+            SearchResponse object
+        """
+        for outcome in outcomes:
+            metrics.ENGINE_OUTCOMES.labels(outcome.engine, outcome.status).inc()
+            if outcome.success:
+                metrics.ENGINE_RESULTS.labels(outcome.engine).observe(len(outcome.results))
+        
+        all_results = [result for outcome in outcomes for result in outcome.results]
         
         if not all_results:
-            return format_empty_response(query)
+            response = format_empty_response(query)
+        else:
+            ranked_results = merge_and_rank_results(
+                all_results, query, max_results, self.ranker, self.engine_weights
+            )
+            response = format_search_response(query, ranked_results)
         
-        ranked_results = merge_and_rank_results(all_results, query, max_results)
-        return format_search_response(query, ranked_results)
+        response.engine_status = {outcome.engine: outcome.status for outcome in outcomes}
+        
+        # Only an empty response (every engine empty or failed) is flagged;
+        # one engine's cached empty page does not make a page of results negative
+        response.negative_cached = not all_results and any(outcome.negative_cached for outcome in outcomes)
+        return response
+    
+    async def _fetch_engine(
+        self,
+        engine: 'BaseSearchEngine',
+        query: str,
+        max_results: int,
+        use_cache: bool,
+        started: float,
+        granted: Dict[str, float],
+        hedge: bool = False,
+        priority: str = 'interactive'
+    ) -> EngineResults:
+        """
+        Fetch one engine, capturing failures and caching the outcome
+        
+        Records in granted when the engine's first request leaves the
+        upstream queue, so queue wait is told apart from upstream time.
+        """
+        breaker = self.breakers[engine.name]
+        fetch_started = time.perf_counter()
+        try:
+            if hedge:
+                results = await self._fetch_hedged(engine, query, max_results, priority, granted)
+            else:
+                results = await self._fetch_scheduled(engine, query, max_results, priority, granted)
+        except asyncio.CancelledError:
+            # Not awaited: this task is going away
+            asyncio.get_running_loop().run_in_executor(None, breaker.abandon)
+            raise
+        except Exception as e:
+            # Only the engine's own REQUEST_TIMEOUT counts as a timeout
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            await breaker.record_failure_async(timed_out=timed_out)
+            error = str(e) or ('timed out' if timed_out else type(e).__name__)
+            print(f"{engine.name} search failed: {error}")
+            if use_cache and self.negative_error_timeout > 0:
+                await self._run_blocking(
+                    self.cache_service.set_engine_error, engine.name, query, error, self.negative_error_timeout
+                )
+            return EngineResults(
+                engine=engine.name,
+                error=error,
+                timed_out=timed_out,
+                queue_ms=(granted.get(engine.name, fetch_started) - fetch_started) * 1000,
+                elapsed_ms=(time.perf_counter() - started) * 1000
+            )
+        
+        await breaker.record_success_async(len(results))
+        timeout = self.engine_cache_timeouts.get(engine.name, self.engine_cache_timeout)
+        if not results:
+            timeout = min(timeout, self.negative_empty_timeout)
+        if use_cache and timeout > 0:
+            await self._run_blocking(
+                self.cache_service.set_engine_results, engine.name, query, results, max_results, timeout
+            )
+        return EngineResults(
+            engine=engine.name,
+            results=results,
+            queue_ms=(granted[engine.name] - fetch_started) * 1000,
+            elapsed_ms=(time.perf_counter() - started) * 1000
+        )
+    
+    async def _fetch_hedged(
+        self,
+        engine: 'BaseSearchEngine',
+        query: str,
+        max_results: int,
+        priority: str = 'interactive',
+        granted: Dict[str, float] = None
+    ) -> List[SearchResult]:
+        """
+        Fetch one engine, sending a second request if the first is slow
+        
+        Once the engine has enough latency samples, a request still running
+        after its observed p95 is raced against a fresh one; the first to
+        succeed wins and the other is cancelled. The hedge queues for its
+        own upstream slot like any other request.
+        """
+        threshold_ms = engine.latency_percentile(self.hedge_percentile, self.hedge_min_samples)
+        if threshold_ms is None:
+            return await self._fetch_scheduled(engine, query, max_results, priority, granted)
+        
+        primary = asyncio.ensure_future(self._fetch_scheduled(engine, query, max_results, priority, granted))
+        attempts = {primary}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=threshold_ms / 1000)
+            if done:
+                return primary.result()
+            
+            engine.hedged_requests += 1
+            attempts.add(asyncio.ensure_future(self._fetch_scheduled(engine, query, max_results, priority, granted)))
+            error = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+    
+    async def _fetch_scheduled(
+        self,
+        engine: 'BaseSearchEngine',
+        query: str,
+        max_results: int,
+        priority: str,
+        granted: Dict[str, float] = None
+    ) -> List[SearchResult]:
+        """Fetch one engine once the upstream scheduler grants a slot, noting when in granted"""
+        async with self.scheduler.slot(engine.name, priority):
+            if granted is not None:
+                granted.setdefault(engine.name, time.perf_counter())
+            return await engine.fetch_results_async(query, max_results)
+    
+    async def _run_blocking(self, fn: Callable[..., T], *args) -> T:
+        """Run a blocking call, such as a Redis round-trip, on the loop's executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+    
+    def run_async(self, coro: Awaitable[T]) -> T:
+        """
+        Run a coroutine on the shared event loop and wait for its result
+        
+        Args:
+            coro: Coroutine to run
+            
+        Returns:
+            The coroutine's result
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+        return future.result()
+    
+    async def await_async(self, coro: Awaitable[T]) -> T:
+        """
+        Await a coroutine on the shared event loop from another event loop
+        
+        Lets async request handlers run searches without holding a thread.
+        Cancelling the caller cancels the coroutine.
+        
+        Args:
+            coro: Coroutine to run
+            
+        Returns:
+            The coroutine's result
+        """
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._get_loop()))
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the shared event loop, starting its thread if needed"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name='search-event-loop',
+                    daemon=True
+                ).start()
+            return self._loop
+    
+    async def aclose(self):
+        """Close the engines' async HTTP sessions; must run on the shared event loop"""
+        for engine in self.engines.loaded().values():
+            await engine.aclose()
     
     def get_available_engines(self) -> List[str]:
         """
@@ -107,4 +747,76 @@ class SearchService:
         Returns:
             List of engine names
         """
-        return list(self.engines.keys())
\ No newline at end of file
+        return list(self.engines)
+    
+    def load_engines(self) -> Dict[str, dict]:
+        """
+        Load every enabled engine and report whether it can serve
+        
+        Returns:
+            Dict mapping engine name to its 'loaded' flag, load error and
+            circuit breaker state
+        """
+        errors = self.engines.load_all()
+        return {
+            name: {
+                'loaded': error is None,
+                'error': error,
+                'breaker': self.breakers[name].state
+            }
+            for name, error in errors.items()
+        }
+    
+    def get_connection_stats(self) -> Dict[str, dict]:
+        """
+        Get upstream connection reuse statistics per engine
+        
+        Returns:
+            Dict mapping each loaded engine's name to its connection stats
+        """
+        return {name: engine.get_connection_stats() for name, engine in self.engines.loaded().items()}
+    
+    def get_latency_stats(self) -> Dict[str, dict]:
+        """
+        Get recent upstream latency and hedging statistics per engine
+        
+        Returns:
+            Dict mapping each loaded engine's name to its latency stats
+        """
+        return {name: engine.get_latency_stats() for name, engine in self.engines.loaded().items()}
+    
+    def get_batch_queue_depth(self) -> int:
+        """
+        Get the number of batch searches waiting for a slot
+        
+        Returns:
+            Queued search count
+        """
+        return self._batch_waiting
+    
+    def get_scheduler_stats(self) -> dict:
+        """
+        Get upstream scheduler slot usage, queues and engine rates
+        
+        Returns:
+            Scheduler stats dict
+        """
+        return self.scheduler.get_stats()
+    
+    def get_breaker_stats(self) -> Dict[str, dict]:
+        """
+        Get circuit breaker state per engine
+        
+        Returns:
+            Dict mapping engine name to its breaker state and rates
+        """
+        return {name: breaker.get_stats() for name, breaker in self.breakers.items()}
+    
+    def get_parse_stats(self) -> Dict[str, dict]:
+        """
+        Get result page parse times per engine
+        
+        Returns:
+            Dict mapping each loaded engine's name to its parse stats
+        """
+        return {name: engine.get_parse_stats() for name, engine in self.engines.loaded().items()}
\ No newline at end of file
@@ -0,0 +1,303 @@
+"""
+Cache tier in a memory-mapped file shared by the worker processes on a host
+
+The file is a header followed by a fixed table of equal-size slots. A key
+hashes to a slot and may live in any of the PROBE_SLOTS after it; a write
+takes the key's own slot, else a free or expired one, else evicts the one
+expiring soonest. Values are opaque bytes; anything too big for a slot is
+simply not stored, and reads fall through to the next tier.
+
+Reads take no lock. Each slot carries a sequence number that is odd while
+it is being written, and a CRC of its key and value, so a reader that
+races a writer, or finds a slot left half-written by a crashed worker,
+sees a miss rather than torn data. Writers are serialized by an flock on
+the file, which the kernel releases when a process dies.
+"""
+import contextlib
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows
+    fcntl = None
+
+
+MAGIC = b'PPSC'
+VERSION = 1
+
+# magic, version, slot count, slot size
+HEADER = struct.Struct('<4sIII')
+HEADER_BYTES = 64
+
+# sequence, key hash, expires at (wall time), key length, value length, CRC
+SLOT = struct.Struct('<QQdIII')
+
+# Slots a key may occupy after its home slot
+PROBE_SLOTS = 8
+
+
+class SharedMemoryCache:
+    """Fixed-size hash-indexed slab of bytes values with TTLs, shared through mmap"""
+    
+    def __init__(self, path: str, slots: int = 2048, slot_bytes: int = 16384):
+        """
+        Open the shared file, creating and sizing it if it is new
+        
+        Args:
+            path: File to map, ideally on tmpfs such as /dev/shm
+            slots: Number of slots
+            slot_bytes: Size of each slot, including its SLOT header
+        
+        Raises:
+            OSError: If the file cannot be created, sized or mapped
+            RuntimeError: If file locking is unavailable, or the file was
+                created with another layout
+        """
+        if fcntl is None:
+            raise RuntimeError("The shared cache needs fcntl file locking")
+        if slot_bytes <= SLOT.size:
+            raise ValueError(f"Slots must be larger than {SLOT.size} bytes")
+        
+        self.path = path
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.max_item_bytes = slot_bytes - SLOT.size
+        self.size = HEADER_BYTES + slots * slot_bytes
+        self.evictions = 0
+        
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._prepare_file()
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(self._fd, self.size)
+        except Exception:
+            os.close(self._fd)
+            raise
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a live value
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Stored bytes, or None if absent, expired or being rewritten
+        """
+        key_bytes = key.encode('utf-8')
+        key_hash = self._hash(key_bytes)
+        now = time.time()
+        
+        for offset in self._probe(key_hash):
+            seq, slot_hash, expires_at, key_len, value_len, crc = SLOT.unpack_from(self._map, offset)
+            if slot_hash != key_hash or seq & 1:
+                continue
+            if expires_at <= now or key_len + value_len > self.max_item_bytes:
+                return None
+            
+            start = offset + SLOT.size
+            data = self._map[start:start + key_len + value_len]
+            
+            # A writer got in while we copied: treat as a miss
+            if SLOT.unpack_from(self._map, offset)[0] != seq:
+                return None
+            if zlib.crc32(data) != crc or data[:key_len] != key_bytes:
+                continue
+            return data[key_len:]
+        return None
+    
+    def set(self, key: str, value: bytes, timeout: float) -> bool:
+        """
+        Store a value, evicting if the key's slots are all live
+        
+        Args:
+            key: Cache key
+            value: Bytes to store
+            timeout: TTL in seconds
+        
+        Returns:
+            True if stored, False if it does not fit in a slot
+        """
+        key_bytes = key.encode('utf-8')
+        if timeout <= 0 or len(key_bytes) + len(value) > self.max_item_bytes:
+            return False
+        
+        key_hash = self._hash(key_bytes)
+        data = key_bytes + value
+        with self._write_lock():
+            offset = self._choose_slot(key_hash, key_bytes)
+            
+            # Odd while the slot is inconsistent; readers skip it
+            seq = SLOT.unpack_from(self._map, offset)[0]
+            writing = seq + 1 if seq % 2 == 0 else seq + 2
+            struct.pack_into('<Q', self._map, offset, writing)
+            
+            start = offset + SLOT.size
+            self._map[start:start + len(data)] = data
+            SLOT.pack_into(
+                self._map, offset,
+                writing, key_hash, time.time() + timeout, len(key_bytes), len(value), zlib.crc32(data)
+            )
+            struct.pack_into('<Q', self._map, offset, writing + 1)
+        return True
+    
+    def delete(self, key: str):
+        """Remove a key if present"""
+        key_bytes = key.encode('utf-8')
+        key_hash = self._hash(key_bytes)
+        with self._write_lock():
+            for offset in self._probe(key_hash):
+                if self._slot_key(offset) == key_bytes:
+                    self._empty_slot(offset)
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._write_lock():
+            for index in range(self.slots):
+                self._empty_slot(HEADER_BYTES + index * self.slot_bytes)
+    
+    def stats(self) -> dict:
+        """
+        Get current occupancy
+        
+        Returns:
+            Dict with live entries, bytes held and the slab layout
+        """
+        now = time.time()
+        entries = 0
+        used = 0
+        for index in range(self.slots):
+            seq, _, expires_at, key_len, value_len, _ = SLOT.unpack_from(
+                self._map, HEADER_BYTES + index * self.slot_bytes
+            )
+            if seq and not seq & 1 and expires_at > now:
+                entries += 1
+                used += key_len + value_len
+        return {
+            'path': self.path,
+            'entries': entries,
+            'bytes': used,
+            'slots': self.slots,
+            'slot_bytes': self.slot_bytes,
+            # By this process only
+            'evictions': self.evictions
+        }
+    
+    def close(self):
+        """Unmap the file; the data stays for other workers"""
+        self._map.close()
+        os.close(self._fd)
+    
+    def _prepare_file(self):
+        """Size and initialize the file unless it already has our layout"""
+        header = os.pread(self._fd, HEADER.size, 0)
+        if len(header) == HEADER.size and header[:len(MAGIC)] == MAGIC:
+            _, version, slots, slot_bytes = HEADER.unpack(header)
+            if (version, slots, slot_bytes) == (VERSION, self.slots, self.slot_bytes):
+                return
+            # Resizing would fault any worker that has it mapped
+            raise RuntimeError(
+                f"{self.path} was created with another layout (version {version}, {slots} x {slot_bytes} bytes)"
+            )
+        
+        # New file, or one whose creator died before writing the header.
+        # Space is reserved up front so a full tmpfs fails here instead of
+        # with SIGBUS on a later write through the map.
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self.size)
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(self._fd, 0, self.size)
+        os.pwrite(self._fd, HEADER.pack(MAGIC, VERSION, self.slots, self.slot_bytes), 0)
+        os.fsync(self._fd)
+    
+    @contextlib.contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Exclusive across this process's threads and other processes"""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    def _probe(self, key_hash: int) -> Iterator[int]:
+        """Offsets of the slots a key may occupy"""
+        home = key_hash % self.slots
+        for step in range(min(PROBE_SLOTS, self.slots)):
+            yield HEADER_BYTES + ((home + step) % self.slots) * self.slot_bytes
+    
+    def _choose_slot(self, key_hash: int, key_bytes: bytes) -> int:
+        """Slot to write a key to; caller must hold the write lock"""
+        now = time.time()
+        free = None
+        victim = None
+        victim_expires = None
+        for offset in self._probe(key_hash):
+            seq, slot_hash, expires_at, _, _, _ = SLOT.unpack_from(self._map, offset)
+            if slot_hash == key_hash and self._slot_key(offset) == key_bytes:
+                return offset
+            
+            # Odd here means a writer died mid-write, since we hold the lock
+            if free is None and (seq == 0 or seq & 1 or expires_at <= now):
+                free = offset
+            if victim is None or expires_at < victim_expires:
+                victim, victim_expires = offset, expires_at
+        
+        if free is not None:
+            return free
+        self.evictions += 1
+        return victim
+    
+    def _slot_key(self, offset: int) -> Optional[bytes]:
+        """Key stored in a consistent slot; caller must hold the write lock"""
+        seq, _, _, key_len, _, _ = SLOT.unpack_from(self._map, offset)
+        if seq == 0 or seq & 1 or key_len > self.max_item_bytes:
+            return None
+        start = offset + SLOT.size
+        return self._map[start:start + key_len]
+    
+    def _empty_slot(self, offset: int):
+        """Mark a slot free, bumping its sequence so readers notice"""
+        # Same odd phase as set(), so no reader sees the new even sequence
+        # next to the old header
+        seq = SLOT.unpack_from(self._map, offset)[0]
+        writing = seq + 1 if seq % 2 == 0 else seq + 2
+        struct.pack_into('<Q', self._map, offset, writing)
+        SLOT.pack_into(self._map, offset, writing, 0, 0.0, 0, 0, 0)
+        struct.pack_into('<Q', self._map, offset, writing + 1)
+    
+    @staticmethod
+    def _hash(key_bytes: bytes) -> int:
+        # Never 0, which marks a free slot
+        return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), 'little') or 1
+
+
+def open_shared_cache(path: str, slots: int, slot_bytes: int) -> Optional[SharedMemoryCache]:
+    """
+    Open the shared cache, or return None so callers fall back to Redis
+    
+    Args:
+        path: File to map
+        slots: Number of slots
+        slot_bytes: Size of each slot
+    
+    Returns:
+        SharedMemoryCache, or None if it could not be opened
+    """
+    try:
+        return SharedMemoryCache(path, slots, slot_bytes)
+    except Exception as e:
+        print(f"⚠️ Shared memory cache disabled: {str(e)}")
+        return None
\ No newline at end of file
@@ -0,0 +1,322 @@
+"""
+Single-flight coalescing of concurrent upstream fetches
+"""
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+# Delete the lock only if we still own it
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    """In-flight call that other threads and coroutines can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.callbacks = []
+
+
+class SingleFlight:
+    """Run at most one fetch per key, in-process and across workers"""
+    
+    def __init__(
+        self,
+        redis_client=None,
+        lock_ttl: float = 15,
+        wait_timeout: float = 12,
+        poll_interval: float = 0.05
+    ):
+        self.redis = redis_client
+        
+        # Async client used by do_async, set by the ASGI entry point
+        self.async_redis = None
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+    
+    def do(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        lookup: Callable[[], Any] = None
+    ) -> Any:
+        """
+        Run fn once for all concurrent callers of the same key
+        
+        Threads in this process that arrive while a call is in flight wait
+        for its result. The leader then takes a short-lived Redis lease so
+        other workers wait too, polling lookup (usually a cache read) for
+        the value the lease holder stores. Waiters that time out, or whose
+        leader failed, fall back to calling fn themselves.
+        
+        Args:
+            key: Coalescing key, e.g. the search cache key
+            fn: Function performing the fetch
+            lookup: Function returning the stored result or None
+        
+        Returns:
+            Result of fn, or of lookup when another worker fetched it
+        """
+        call, is_leader = self._join(key)
+        
+        if not is_leader:
+            if call.done.wait(self.wait_timeout) and call.error is None:
+                return call.result
+            return fn()
+        
+        try:
+            call.result = self._do_leased(key, fn, lookup)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+    
+    async def do_async(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Any]] = None
+    ) -> Any:
+        """
+        Coroutine version of do(), for async request handlers
+        
+        Shares in-flight calls with do(), so threads and coroutines in
+        this process coalesce on the same key, and waits without holding
+        a thread. Uses async_redis for the lease when it is set.
+        
+        Args:
+            key: Coalescing key, e.g. the search cache key
+            fn: Coroutine function performing the fetch
+            lookup: Coroutine function returning the stored result or None
+        
+        Returns:
+            Result of fn, or of lookup when another worker fetched it
+        """
+        call, is_leader = self._join(key)
+        
+        if not is_leader:
+            if await self._wait_async(call) and call.error is None:
+                return call.result
+            return await fn()
+        
+        try:
+            call.result = await self._do_leased_async(key, fn, lookup)
+            return call.result
+        except BaseException as e:
+            # Includes cancellation, so waiters fetch for themselves
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+    
+    def do_in_background(self, key: str, fn: Callable[[], Any], executor: Executor) -> bool:
+        """
+        Start fn in the background unless a fetch for key is already running
+        
+        Used for cache refreshes: nobody waits on the result, so when another
+        thread or worker already holds the key the refresh is simply skipped.
+        
+        Args:
+            key: Coalescing key, e.g. the search cache key
+            fn: Function performing the fetch
+            executor: Executor to run fn on
+            
+        Returns:
+            True if a background fetch was scheduled
+        """
+        call, is_leader = self._join(key)
+        if not is_leader:
+            return False
+        
+        def run():
+            try:
+                token = self._acquire_lease(key)
+                if token is None:
+                    return
+                try:
+                    call.result = fn()
+                finally:
+                    self._release(key, token)
+            except Exception as e:
+                call.error = e
+                print(f"Background fetch failed for {key}: {str(e)}")
+            finally:
+                self._finish(key, call)
+        
+        try:
+            executor.submit(run)
+        except Exception:
+            self._finish(key, call)
+            raise
+        return True
+    
+    def _join(self, key: str) -> Tuple[_Call, bool]:
+        """Join the in-flight call for key, or register a new one"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            return call, True
+    
+    def _finish(self, key: str, call: _Call):
+        """Unregister a call and wake its waiters"""
+        with self._lock:
+            self._calls.pop(key, None)
+            call.done.set()
+            callbacks, call.callbacks = call.callbacks, []
+        for callback in callbacks:
+            callback()
+    
+    async def _wait_async(self, call: _Call) -> bool:
+        """Wait for another caller's call without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        woken = loop.create_future()
+        
+        def wake():
+            loop.call_soon_threadsafe(lambda: woken.done() or woken.set_result(None))
+        
+        with self._lock:
+            if call.done.is_set():
+                return True
+            call.callbacks.append(wake)
+        try:
+            await asyncio.wait_for(woken, self.wait_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def _do_leased(self, key: str, fn: Callable[[], Any], lookup: Callable[[], Any]) -> Any:
+        """Run fn under a Redis lease, or wait for the worker holding it"""
+        token = self._acquire_lease(key)
+        if token is not None:
+            try:
+                return fn()
+            finally:
+                self._release(key, token)
+        
+        # Another worker holds the lease; wait for its result to land
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                if lookup is not None:
+                    value = lookup()
+                    if value is not None:
+                        return value
+                if not self.redis.exists(self._lease_key(key)):
+                    break
+        except Exception as e:
+            print(f"Single-flight wait error: {str(e)}")
+        
+        return fn()
+    
+    async def _do_leased_async(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Coroutine version of _do_leased"""
+        token = await self._acquire_lease_async(key)
+        if token is not None:
+            try:
+                return await fn()
+            finally:
+                await self._release_async(key, token)
+        
+        # Another worker holds the lease; wait for its result to land
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                if lookup is not None:
+                    value = await lookup()
+                    if value is not None:
+                        return value
+                if not await self._call_redis('exists', self._lease_key(key)):
+                    break
+        except Exception as e:
+            print(f"Single-flight wait error: {str(e)}")
+        
+        return await fn()
+    
+    async def _call_redis(self, method: str, *args, **kwargs) -> Any:
+        """Run a Redis command on the async client, or the sync one without it"""
+        if self.async_redis is not None:
+            return await getattr(self.async_redis, method)(*args, **kwargs)
+        return getattr(self.redis, method)(*args, **kwargs)
+    
+    async def _acquire_lease_async(self, key: str) -> Optional[str]:
+        """Coroutine version of _acquire_lease"""
+        if self.redis is None and self.async_redis is None:
+            return ''
+        
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self._call_redis(
+                'set', self._lease_key(key), token, nx=True, px=int(self.lock_ttl * 1000)
+            )
+        except Exception as e:
+            print(f"Single-flight lease error: {str(e)}")
+            return ''
+        return token if acquired else None
+    
+    async def _release_async(self, key: str, token: str):
+        """Coroutine version of _release"""
+        if not token:
+            return
+        try:
+            await self._call_redis('eval', RELEASE_SCRIPT, 1, self._lease_key(key), token)
+        except Exception as e:
+            print(f"Single-flight release error: {str(e)}")
+    
+    def _acquire_lease(self, key: str) -> Optional[str]:
+        """
+        Take the cross-worker lease for key
+        
+        Returns:
+            Lease token (empty when there is no Redis to lease from),
+            or None if another worker holds the lease
+        """
+        if self.redis is None:
+            return ''
+        
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis.set(self._lease_key(key), token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            print(f"Single-flight lease error: {str(e)}")
+            return ''
+        return token if acquired else None
+    
+    def _release(self, key: str, token: str):
+        """Release a lease we still own"""
+        if not token:
+            return
+        try:
+            self.redis.eval(RELEASE_SCRIPT, 1, self._lease_key(key), token)
+        except Exception as e:
+            print(f"Single-flight release error: {str(e)}")
+    
+    @staticmethod
+    def _lease_key(key: str) -> str:
+        return f"singleflight:{key}"
\ No newline at end of file
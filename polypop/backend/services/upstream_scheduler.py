@@ -0,0 +1,267 @@
+"""
+Shared scheduler for upstream engine requests
+
+Every request to a search engine waits here for a slot: a global cap on
+requests in flight plus a token bucket per engine, whose rate backs off
+multiplicatively when the engine answers 429/503 and recovers additively
+on success (AIMD). Waiters are served by priority, so interactive
+searches overtake batch and prefetch work queued behind them.
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from typing import AsyncIterator, Dict, Iterable, Optional
+
+from utils import metrics
+
+
+# Highest priority first
+PRIORITIES = ('interactive', 'batch', 'prefetch')
+
+THROTTLE_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """Request rate limit for one engine with AIMD adaptation"""
+    
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        min_rate: float = 0.2,
+        increase: float = 0.05,
+        decrease: float = 0.5
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = float(burst)
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+    
+    def take(self, now: float) -> float:
+        """
+        Take a token if one is available
+        
+        Args:
+            now: Current monotonic time
+        
+        Returns:
+            0 if a token was taken, else seconds until one will be
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    def on_success(self):
+        """Additive increase, up to the configured rate"""
+        self.rate = min(self.max_rate, self.rate + self.increase)
+    
+    def on_throttled(self, granted_at: float, now: float):
+        """
+        Multiplicative decrease, and drop any saved-up burst
+        
+        Requests already in flight when the rate was last cut answer with
+        the same overload, so only one cut is made per round of them.
+        
+        Args:
+            granted_at: When the throttled request was let through
+            now: Current monotonic time
+        """
+        self.throttled += 1
+        if granted_at < self._last_decrease:
+            return
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.tokens = min(self.tokens, 0.0)
+        self._last_decrease = now
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class UpstreamScheduler:
+    """Global concurrency cap and per-engine rate limits, served by priority"""
+    
+    def __init__(
+        self,
+        engine_names: Iterable[str],
+        max_concurrency: int = 16,
+        rates: Dict[str, float] = None,
+        default_rate: float = 5.0,
+        burst: int = 10,
+        min_rate: float = 0.2,
+        increase: float = 0.05,
+        decrease: float = 0.5
+    ):
+        rates = rates or {}
+        self.max_concurrency = max_concurrency
+        self.buckets: Dict[str, TokenBucket] = {
+            name: TokenBucket(rates.get(name, default_rate), burst, min_rate, increase, decrease)
+            for name in engine_names
+        }
+        self.waiting = {priority: 0 for priority in PRIORITIES}
+        self.in_flight = 0
+        
+        # Heap of (priority rank, arrival order, engine, future)
+        self._waiters = []
+        self._order = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    @contextlib.asynccontextmanager
+    async def slot(self, engine: str, priority: str = 'interactive') -> AsyncIterator[None]:
+        """
+        Hold an upstream slot for one request to an engine
+        
+        The engine's rate adapts to how the request ends: an exception
+        carrying a 429/503 'status' (as aiohttp's ClientResponseError does)
+        cuts it, a normal exit raises it, anything else leaves it alone.
+        
+        Args:
+            engine: Engine name
+            priority: One of PRIORITIES
+        """
+        granted_at = await self.acquire(engine, priority)
+        status = None
+        try:
+            yield
+            status = 200
+        except Exception as e:
+            status = getattr(e, 'status', None)
+            raise
+        finally:
+            self.release(engine, granted_at, status)
+    
+    async def acquire(self, engine: str, priority: str = 'interactive') -> float:
+        """
+        Wait for a slot and a token for an engine
+        
+        Must run on the event loop that owns the scheduler. Pair every
+        successful call with release().
+        
+        Args:
+            engine: Engine name
+            priority: One of PRIORITIES
+        
+        Returns:
+            Monotonic time the slot was granted
+        """
+        if priority not in self.waiting:
+            raise ValueError(f"Unknown priority: {priority}")
+        
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.index(priority), next(self._order), engine, future))
+        self.waiting[priority] += 1
+        try:
+            self._dispatch()
+            await future
+        except asyncio.CancelledError:
+            # Granted just before the caller was cancelled: give it back
+            if future.done() and not future.cancelled():
+                self.release(engine, future.result())
+            raise
+        finally:
+            self.waiting[priority] -= 1
+        
+        granted_at = future.result()
+        metrics.UPSTREAM_QUEUE_WAIT.labels(engine, priority).observe(granted_at - started)
+        return granted_at
+    
+    def release(self, engine: str, granted_at: float, status: Optional[int] = None):
+        """
+        Return a slot and feed the response status into the engine's rate
+        
+        Args:
+            engine: Engine name
+            granted_at: Value returned by acquire()
+            status: HTTP status, or None when unknown
+        """
+        self.in_flight -= 1
+        bucket = self.buckets.get(engine)
+        if bucket is not None and status is not None:
+            if status in THROTTLE_STATUSES:
+                bucket.on_throttled(granted_at, time.monotonic())
+                print(f"🐢 {engine} throttled ({status}), rate now {bucket.rate:.2f}/s")
+            elif status < 400:
+                bucket.on_success()
+        self._dispatch()
+    
+    def get_stats(self) -> dict:
+        """
+        Get slot usage, queue lengths and current engine rates
+        
+        Returns:
+            Stats dict
+        """
+        return {
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'waiting': dict(self.waiting),
+            'engines': {
+                name: {
+                    'rate': round(bucket.rate, 3),
+                    'max_rate': bucket.max_rate,
+                    'tokens': round(bucket.tokens, 2),
+                    'throttled': bucket.throttled
+                }
+                for name, bucket in self.buckets.items()
+            }
+        }
+    
+    def _dispatch(self):
+        """Grant slots to waiters in priority order while capacity allows"""
+        now = time.monotonic()
+        held = []
+        blocked = set()
+        retry_in = None
+        
+        while self._waiters and self.in_flight < self.max_concurrency:
+            waiter = heapq.heappop(self._waiters)
+            engine, future = waiter[2], waiter[3]
+            if future.done():
+                continue
+            
+            # An engine out of tokens must not hold up other engines, but
+            # its own waiters keep their order behind the first one
+            if engine in blocked:
+                held.append(waiter)
+                continue
+            bucket = self.buckets.get(engine)
+            wait = bucket.take(now) if bucket is not None else 0.0
+            if wait:
+                blocked.add(engine)
+                held.append(waiter)
+                retry_in = wait if retry_in is None else min(retry_in, wait)
+                continue
+            
+            self.in_flight += 1
+            future.set_result(now)
+        
+        for waiter in held:
+            heapq.heappush(self._waiters, waiter)
+        if retry_in is not None:
+            self._schedule_dispatch(retry_in)
+    
+    def _schedule_dispatch(self, delay: float):
+        """Run _dispatch again once the next token is due"""
+        loop = asyncio.get_running_loop()
+        due = loop.time() + delay
+        if self._timer is not None and not self._timer.cancelled() and self._timer.when() <= due:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(due, self._on_timer)
+    
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Token-budgeted LLM context from ranked results
+"""
+import math
+import re
+from typing import List, Optional, Tuple
+
+from utils.normalize import tokenize
+
+
+# Rough characters per token for English web text
+CHARS_PER_TOKEN = 4
+
+# Results adding fewer unseen terms than this share of their own mostly
+# repeat what is already in the context and are skipped
+MIN_NOVELTY = 0.4
+
+# Separator between results, as in build_context
+SEPARATOR = '\n\n'
+
+BUDGET_RE = re.compile(r'^\s*(\d+)\s*(tokens|chars)?\s*$')
+
+SENTENCE_END_RE = re.compile(r'(?<=[.!?…])\s+')
+
+
+def parse_context_budget(raw: Optional[str]) -> Optional[int]:
+    """
+    Parse a context_budget request parameter, e.g. '800' or '3000chars'
+    
+    Plain numbers and the 'tokens' suffix count estimated tokens.
+    
+    Args:
+        raw: Budget in tokens, or in characters with a 'chars' suffix
+    
+    Returns:
+        Budget in characters, or None for no budget
+    
+    Raises:
+        ValueError: If the budget is malformed or zero
+    """
+    if raw is None or not raw.strip():
+        return None
+    match = BUDGET_RE.match(raw.lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError('"context_budget" must be a positive number of tokens, or of chars with a "chars" suffix')
+    amount = int(match.group(1))
+    return amount if match.group(2) == 'chars' else amount * CHARS_PER_TOKEN
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the LLM tokens in a text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def trim_to_sentences(text: str, max_chars: int) -> str:
+    """
+    Keep the leading whole sentences of a text that fit in max_chars
+    
+    Args:
+        text: Text to trim
+        max_chars: Maximum length
+    
+    Returns:
+        Trimmed text, empty if not even the first sentence fits
+    """
+    if len(text) <= max_chars:
+        return text
+    kept = ''
+    for sentence in SENTENCE_END_RE.split(text):
+        candidate = f"{kept} {sentence}" if kept else sentence
+        if len(candidate) > max_chars:
+            break
+        kept = candidate
+    return kept
+
+
+def build_budgeted_context(data: List[dict], max_chars: int) -> Tuple[str, int]:
+    """
+    Build the LLM context from result dictionaries within a size budget
+    
+    Results are taken greedily by marginal information: the number of
+    terms they add that the context does not have yet, discounted by
+    their rank. Results that mostly repeat earlier ones are skipped, and
+    a snippet that does not fit is cut at a sentence boundary.
+    
+    Args:
+        data: Ranked list of result dictionaries
+        max_chars: Maximum context length in characters
+    
+    Returns:
+        Tuple of (context, estimated tokens)
+    """
+    candidates = []
+    for rank, r in enumerate(data):
+        terms = set(tokenize(f"{r['title']} {r['snippet']}"))
+        if terms:
+            candidates.append((1 / math.log2(rank + 2), terms, r))
+    
+    covered = set()
+    parts = []
+    length = 0
+    while candidates:
+        remaining = max_chars - length - (len(SEPARATOR) if parts else 0)
+        
+        # Drop what no longer adds enough, then take the best of the rest
+        candidates = [c for c in candidates if len(c[1] - covered) >= MIN_NOVELTY * len(c[1])]
+        if not candidates or remaining <= 0:
+            break
+        best = max(candidates, key=lambda c: c[0] * len(c[1] - covered))
+        candidates.remove(best)
+        
+        r = best[2]
+        if len(r['title']) > remaining:
+            continue
+        snippet = trim_to_sentences(r['snippet'], remaining - len(r['title']) - 1)
+        text = f"{r['title']}\n{snippet}" if snippet else r['title']
+        
+        parts.append(text)
+        length += len(text) + (len(SEPARATOR) if len(parts) > 1 else 0)
+        covered.update(tokenize(text))
+    
+    context = SEPARATOR.join(parts)
+    return context, estimate_tokens(context)
\ No newline at end of file
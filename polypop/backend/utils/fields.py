@@ -0,0 +1,77 @@
+"""
+Utilities for projecting search responses onto requested fields
+"""
+from typing import Optional, Tuple
+
+
+# Top-level fields of a search response
+RESPONSE_FIELDS = (
+    'success', 'query', 'data', 'context', 'context_tokens', 'count', 'cached', 'stale', 'negative_cached',
+    'message', 'engines'
+)
+
+# Fields of each result in 'data', selectable as 'data.<field>'
+RESULT_FIELDS = ('title', 'snippet', 'url', 'source', 'relevance_score')
+
+
+def parse_fields(raw: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a fields request parameter, e.g. 'context' or 'data.url,data.title'
+    
+    Args:
+        raw: Comma-separated field names, or None
+    
+    Returns:
+        Sorted field names, or None for the full response
+    
+    Raises:
+        ValueError: If a field is unknown
+    """
+    if raw is None:
+        return None
+    fields = {name.strip() for name in raw.split(',') if name.strip()}
+    if not fields:
+        return None
+    
+    unknown = [
+        name for name in fields
+        if name not in RESPONSE_FIELDS
+        and not (name.startswith('data.') and name[len('data.'):] in RESULT_FIELDS)
+    ]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(fields))
+
+
+def project_response(response: dict, fields: Optional[Tuple[str, ...]]) -> dict:
+    """
+    Keep only the requested fields of a response dictionary
+    
+    'success' is always kept so clients can tell errors apart, and
+    'data' alone keeps whole results while 'data.<field>' keeps only
+    those fields of each result.
+    
+    Args:
+        response: Response dictionary
+        fields: Output of parse_fields; None keeps everything
+    
+    Returns:
+        Projected response dictionary
+    """
+    if fields is None:
+        return response
+    
+    projected = {'success': response['success']}
+    result_fields = []
+    for name in fields:
+        if name.startswith('data.'):
+            result_fields.append(name[len('data.'):])
+        elif name in response:
+            projected[name] = response[name]
+    
+    if result_fields and 'data' not in projected:
+        projected['data'] = [
+            {key: result[key] for key in result_fields if key in result}
+            for result in response.get('data', [])
+        ]
+    return projected
\ No newline at end of file
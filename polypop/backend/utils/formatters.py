@@ -1,8 +1,10 @@
 """
 Utilities for formatting API responses
 """
+import json
 from typing import List
 from models.search_result import SearchResult, SearchResponse
+from utils.context import build_budgeted_context
 
 
 def format_search_response(
@@ -24,22 +26,61 @@ def format_search_response(
     # Convert results to dicts
     data = [r.to_dict() for r in results]
     
-    # Create context string
-    context = '\n\n'.join([
-        f"{r.title}\n{r.snippet}"
-        for r in results
-    ])
-    
     return SearchResponse(
         success=True,
         query=query,
         data=data,
-        context=context,
+        context=build_context(data),
         count=len(results),
         cached=cached
     )
 
 
+def format_cached_response(cached: dict, query: str, max_results: int, context_budget: int = None) -> dict:
+    """
+    Serve a request from a cached superset response
+    
+    The cache holds the ranked list at MAX_RESULTS_LIMIT, so smaller
+    requests for the same normalized query are answered by slicing it.
+    
+    Args:
+        cached: Cached response dictionary
+        query: Query as sent by this client
+        max_results: Maximum results to return
+        context_budget: Maximum context length in characters, if any
+        
+    Returns:
+        Response dictionary for this request
+    """
+    data = cached['data'][:max_results]
+    response = dict(cached)
+    response.update({
+        'query': query,
+        'data': data,
+        'context': build_context(data),
+        'count': len(data)
+    })
+    if context_budget is not None:
+        response['context'], response['context_tokens'] = build_budgeted_context(data, context_budget)
+    return response
+
+
+def build_context(data: List[dict]) -> str:
+    """
+    Build the LLM context string from result dictionaries
+    
+    Args:
+        data: List of result dictionaries
+        
+    Returns:
+        Titles and snippets joined into one string
+    """
+    return '\n\n'.join([
+        f"{r['title']}\n{r['snippet']}"
+        for r in data
+    ])
+
+
 def format_empty_response(query: str) -> SearchResponse:
     """
     Format empty search response
@@ -74,4 +115,21 @@ def format_error_response(error: str) -> dict:
     return {
         'success': False,
         'error': error
-    }
\ No newline at end of file
+    }
+
+
+def format_stream_event(event: str, data: dict, sse: bool = False) -> str:
+    """
+    Format one event of a streaming search response
+    
+    Args:
+        event: Event name, e.g. 'engine' or 'context'
+        data: Event payload
+        sse: Use Server-Sent Events framing instead of NDJSON
+        
+    Returns:
+        Serialized event
+    """
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({'event': event, **data}) + '\n'
\ No newline at end of file
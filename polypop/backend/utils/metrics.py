@@ -0,0 +1,343 @@
+"""
+Process-wide metrics exposed in the Prometheus text format
+
+Counters and histograms are striped: each thread writes to one of a few
+shards with its own lock, so request threads and the search event loop
+almost never contend, and a scrape sums the shards.
+"""
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+STRIPES = 8
+
+# Seconds; upstream fetches and whole requests
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds; HTML parsing is much faster than the network
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+# Seconds; time spent queued for an upstream slot, usually none at all
+QUEUE_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Results parsed from one engine page
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50)
+
+_stripe_ids = itertools.count()
+_local = threading.local()
+
+
+def _stripe() -> int:
+    """Shard index of the calling thread, assigned round-robin on first use"""
+    try:
+        return _local.stripe
+    except AttributeError:
+        _local.stripe = next(_stripe_ids) % STRIPES
+        return _local.stripe
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    """One labelled counter"""
+    
+    def __init__(self):
+        self._shards = [[threading.Lock(), 0.0] for _ in range(STRIPES)]
+    
+    def inc(self, amount: float = 1):
+        shard = self._shards[_stripe()]
+        with shard[0]:
+            shard[1] += amount
+    
+    def value(self) -> float:
+        return sum(shard[1] for shard in self._shards)
+
+
+class _HistogramChild:
+    """One labelled histogram"""
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # Per shard: lock, per-bucket counts (last is +Inf), sum
+        self._shards = [[threading.Lock(), [0] * (len(buckets) + 1), 0.0] for _ in range(STRIPES)]
+    
+    def observe(self, value: float):
+        index = bisect_left(self._buckets, value)
+        shard = self._shards[_stripe()]
+        with shard[0]:
+            shard[1][index] += 1
+            shard[2] += value
+    
+    def snapshot(self) -> Tuple[List[int], float]:
+        counts = [0] * (len(self._buckets) + 1)
+        total = 0.0
+        for lock, shard_counts, shard_sum in self._shards:
+            with lock:
+                counts = [a + b for a, b in zip(counts, shard_counts)]
+                total += shard_sum
+        return counts, total
+
+
+class _Metric(ABC):
+    """A metric family with optional labels"""
+    
+    kind = ''
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+    
+    def labels(self, *values):
+        """Get the child for a set of label values, creating it once"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in sorted(children, key=lambda item: item[0]):
+            lines.extend(self._render_child(key, child))
+        return lines
+    
+    @abstractmethod
+    def _new_child(self):
+        """Create the value holder for one set of label values"""
+        pass
+    
+    @abstractmethod
+    def _render_child(self, key: Tuple[str, ...], child) -> List[str]:
+        """Render one child's sample lines"""
+        pass
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    
+    kind = 'counter'
+    
+    def inc(self, amount: float = 1):
+        """Increment the unlabelled counter"""
+        self.labels().inc(amount)
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value())}"]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+    
+    kind = 'histogram'
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def observe(self, value: float):
+        """Observe a value on the unlabelled histogram"""
+        self.labels().observe(value)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def _render_child(self, key, child):
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read from callbacks at scrape time"""
+    
+    kind = 'gauge'
+    
+    def _new_child(self):
+        return lambda: 0
+    
+    def set_function(self, fn: Callable[[], float], *values):
+        """
+        Read this gauge's value from fn on every scrape
+        
+        Args:
+            fn: Function returning the current value
+            values: Label values
+        """
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            self._children[key] = fn
+    
+    def _render_child(self, key, child):
+        try:
+            value = child()
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Registry:
+    """Collection of metric families rendered together"""
+    
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+    
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+        
+        Returns:
+            Exposition text
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.register(Histogram(
+    'polypop_request_duration_seconds',
+    'Time to produce a response, by route and status (streams: time to first byte)',
+    ('route', 'method', 'status')
+))
+
+UPSTREAM_DURATION = registry.register(Histogram(
+    'polypop_upstream_duration_seconds',
+    'Upstream fetch and parse time of successful engine requests',
+    ('engine',)
+))
+
+UPSTREAM_RESPONSES = registry.register(Counter(
+    'polypop_upstream_responses_total',
+    'Upstream engine responses by HTTP status, or connect_error/timeout',
+    ('engine', 'status')
+))
+
+UPSTREAM_QUEUE_WAIT = registry.register(Histogram(
+    'polypop_upstream_queue_wait_seconds',
+    'Time an engine request waited for the upstream scheduler, by priority',
+    ('engine', 'priority'),
+    QUEUE_WAIT_BUCKETS
+))
+
+UPSTREAM_RATE_LIMIT = registry.register(Gauge(
+    'polypop_upstream_rate_limit',
+    'Current adaptive request rate limit per engine (requests per second)',
+    ('engine',)
+))
+
+PARSE_DURATION = registry.register(Histogram(
+    'polypop_parse_duration_seconds',
+    'Result page parse time',
+    ('engine', 'parser'),
+    PARSE_BUCKETS
+))
+
+ENGINE_OUTCOMES = registry.register(Counter(
+    'polypop_engine_outcomes_total',
+    'Engine outcomes per search: ok, cached, error, timeout, circuit_open or queued',
+    ('engine', 'status')
+))
+
+ENGINE_RESULTS = registry.register(Histogram(
+    'polypop_engine_results',
+    'Results returned by one engine for one search',
+    ('engine',),
+    COUNT_BUCKETS
+))
+
+CACHE_TIER_REQUESTS = registry.register(Counter(
+    'polypop_cache_tier_requests_total',
+    'Cache reads per tier (l1 memory, shm shared memory, l2 redis) by hit or miss',
+    ('tier', 'result')
+))
+
+CACHE_LOOKUPS = registry.register(Counter(
+    'polypop_cache_lookups_total',
+    'Search response cache lookups: hit, stale, negative (a cached empty response) or miss',
+    ('result',)
+))
+
+NEGATIVE_CACHE = registry.register(Counter(
+    'polypop_negative_cache_total',
+    'Negative cache entries stored and served, by scope (response, engine) and kind (empty, error)',
+    ('scope', 'kind', 'event')
+))
+
+PARTIAL_RESPONSES = registry.register(Counter(
+    'polypop_partial_responses_total',
+    'Search responses missing an engine, by engine, its status and whether the response was cached (store) or not (skip)',
+    ('engine', 'status', 'event')
+))
+
+RANKING_CANDIDATES = registry.register(Counter(
+    'polypop_ranking_candidates_total',
+    'Results passed to merge_and_rank_results'
+))
+
+RANKING_DUPLICATES = registry.register(Counter(
+    'polypop_ranking_duplicates_total',
+    'Results dropped by merge_and_rank_results as same-URL or near-duplicate text (dedup ratio: / candidates)',
+    ('kind',)
+))
+
+FIRST_RESULT_DURATION = registry.register(Histogram(
+    'polypop_stream_first_result_seconds',
+    'Time to the first engine with results on /search/stream'
+))
+
+QUEUE_DEPTH = registry.register(Gauge(
+    'polypop_queue_depth',
+    'Work waiting for a worker, by pool',
+    ('pool',)
+))
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Utilities for normalizing search parameters
+"""
+import re
+import string
+import unicodedata
+from typing import Iterable, List
+
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Punctuation becomes whitespace before splitting into tokens
+PUNCTUATION_TABLE = str.maketrans({ch: ' ' for ch in string.punctuation + '‘’“”–—…·«»'})
+
+# Separates texts when many are tokenized in one pass
+SEPARATOR = '\x00'
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different spellings share a cache entry
+    
+    Applies NFKC normalization and Unicode casefolding, replaces
+    punctuation with spaces and collapses runs of whitespace.
+    
+    Args:
+        query: Raw search query
+        
+    Returns:
+        Normalized query string
+    """
+    text = unicodedata.normalize('NFKC', query).casefold()
+    text = ''.join(
+        ' ' if unicodedata.category(char).startswith('P') else char
+        for char in text
+    )
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into case-folded word tokens
+    
+    Cheaper than normalize_query: only ASCII and common typographic
+    punctuation is split on, which is enough for ranking and dedup.
+    
+    Args:
+        text: Text to tokenize
+        
+    Returns:
+        List of tokens
+    """
+    return text.casefold().translate(PUNCTUATION_TABLE).split()
+
+
+def normalize_engines(engine_names: Iterable[str], available: Iterable[str]) -> List[str]:
+    """
+    Drop unknown and duplicate engine names, keeping request order
+    
+    Args:
+        engine_names: Requested engine names
+        available: Names of configured engines
+        
+    Returns:
+        List of known engine names
+    """
+    available = set(available)
+    engines = []
+    for name in engine_names:
+        name = name.strip().lower()
+        if name in available and name not in engines:
+            engines.append(name)
+    return engines
\ No newline at end of file
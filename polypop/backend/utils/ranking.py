@@ -1,8 +1,16 @@
 """
 Utilities for ranking and scoring search results
 """
-from typing import List
+from typing import Dict, List
 from models.search_result import SearchResult
+from utils import metrics
+from utils.bm25 import score_bm25
+from utils.simhash import SimHashIndex, simhash_many
+from utils.urls import canonicalize_url
+
+
+# Ranking engines selectable by name (Config.RANKER)
+RANKERS = ('term_frequency', 'bm25')
 
 
 def calculate_relevance_score(result: SearchResult, query: str) -> int:
@@ -37,28 +45,64 @@ def calculate_relevance_score(result: SearchResult, query: str) -> int:
 def merge_and_rank_results(
     all_results: List[SearchResult],
     query: str,
-    max_results: int = 10
+    max_results: int = 10,
+    ranker: str = 'term_frequency',
+    engine_weights: Dict[str, float] = None
 ) -> List[SearchResult]:
     """
     Merge results from multiple sources and rank by relevance
     
+    Results are deduplicated by canonical URL, so redirect-wrapped and
+    tracking-tagged copies of a page match, and by SimHash of title and
+    snippet, so syndicated copies on other sites match. The first copy,
+    in engine priority order, is kept.
+    
     Args:
         all_results: List of SearchResult objects from all engines
         query: Original search query
         max_results: Maximum number of results to return
+        ranker: One of RANKERS
+        engine_weights: Prior weight per engine name (bm25 only)
         
     Returns:
         Ranked and deduplicated list of SearchResult objects
     """
+    if ranker not in RANKERS:
+        raise ValueError(f"Unknown ranker: {ranker}")
+    
     seen_urls = set()
+    near_duplicates = SimHashIndex()
     unique_results = []
+    url_duplicates = 0
+    text_duplicates = 0
     
-    # Deduplicate by URL
-    for result in all_results:
-        if result.url and result.url not in seen_urls:
-            seen_urls.add(result.url)
+    fingerprints = simhash_many([f"{r.title} {r.snippet}" for r in all_results])
+    for result, fingerprint in zip(all_results, fingerprints):
+        url_key = canonicalize_url(result.url) if result.url else ''
+        if not url_key:
+            continue
+        if url_key in seen_urls:
+            url_duplicates += 1
+            continue
+        seen_urls.add(url_key)
+        
+        if fingerprint is not None and not near_duplicates.add_if_new(fingerprint):
+            text_duplicates += 1
+            continue
+        
+        if ranker == 'term_frequency':
             result.relevance_score = calculate_relevance_score(result, query)
-            unique_results.append(result)
+        unique_results.append(result)
+    
+    metrics.RANKING_CANDIDATES.inc(len(all_results))
+    metrics.RANKING_DUPLICATES.labels('url').inc(url_duplicates)
+    metrics.RANKING_DUPLICATES.labels('near').inc(text_duplicates)
+    
+    if ranker == 'bm25':
+        # One vectorized pass over every candidate
+        scores = score_bm25(unique_results, query, engine_weights=engine_weights)
+        for result, score in zip(unique_results, scores.tolist()):
+            result.relevance_score = round(score, 4)
     
     # Sort by relevance score (descending)
     ranked_results = sorted(
@@ -0,0 +1,143 @@
+"""
+Pre-rendered JSON response bodies with precompressed variants
+"""
+import gzip
+import hashlib
+import json
+from typing import Container, Dict, Optional, Tuple
+
+import brotli
+
+
+# Preferred first when the client accepts several equally
+ENCODINGS = ('br', 'gzip', 'identity')
+
+# Bodies this small are not worth compressing
+MIN_COMPRESS_BYTES = 256
+
+# Response fields that change when the same results are refetched or
+# served from another cache tier, left out of the ETag
+VOLATILE_FIELDS = ('engines', 'cached', 'stale')
+
+
+def content_etag(response: dict) -> str:
+    """
+    Derive an ETag from a response's content, ignoring VOLATILE_FIELDS
+    
+    A refresh that finds the same results keeps the ETag, so clients
+    holding the body still get 304 after the per-engine statuses change.
+    
+    Args:
+        response: Response dictionary, after projection
+    
+    Returns:
+        Unquoted ETag
+    """
+    stable = {key: value for key, value in response.items() if key not in VOLATILE_FIELDS}
+    return hashlib.sha256(json.dumps(stable, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+def render_body(
+    body: bytes,
+    gzip_level: int = 6,
+    brotli_quality: int = 9,
+    codings: Container[str] = ENCODINGS,
+    etag: Optional[str] = None
+) -> dict:
+    """
+    Precompress a serialized JSON body and derive its ETag
+    
+    Args:
+        body: JSON bytes
+        gzip_level: gzip compression level
+        brotli_quality: Brotli quality
+        codings: Content codings to compress for; a body sent once needs
+            only the negotiated one
+        etag: ETag to use, e.g. from content_etag; defaults to a hash of body
+    
+    Returns:
+        Dict with the 'etag' and the body per content coding
+    """
+    rendered = {
+        'etag': etag or hashlib.sha256(body).hexdigest()[:32],
+        'identity': body
+    }
+    if len(body) >= MIN_COMPRESS_BYTES:
+        if 'gzip' in codings:
+            rendered['gzip'] = gzip.compress(body, gzip_level, mtime=0)
+        if 'br' in codings:
+            rendered['br'] = brotli.compress(body, quality=brotli_quality)
+    return rendered
+
+
+def choose_encoding(accept_encodings, available: Container[str] = ENCODINGS) -> str:
+    """
+    Pick the best content coding a request accepts
+    
+    Args:
+        accept_encodings: werkzeug Accept object for Accept-Encoding
+        available: Codings to choose from
+    
+    Returns:
+        Content coding, 'identity' if none of the others is accepted
+    """
+    best: Optional[str] = None
+    best_quality = 0
+    for coding in ENCODINGS:
+        if coding not in available:
+            continue
+        quality = 1 if coding == 'identity' and not accept_encodings else accept_encodings[coding]
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    
+    # identity is acceptable unless explicitly refused
+    return best or 'identity'
+
+
+def negotiate(rendered: dict, accept_encodings) -> Tuple[str, bytes, str]:
+    """
+    Pick the variant to send for a request's Accept-Encoding
+    
+    Each coding gets its own strong ETag, since the bytes on the wire
+    differ between them.
+    
+    Args:
+        rendered: Output of render_body
+        accept_encodings: werkzeug Accept object for Accept-Encoding
+    
+    Returns:
+        Tuple of (content coding, body, unquoted ETag)
+    """
+    best = choose_encoding(accept_encodings, rendered)
+    suffix = '' if best == 'identity' else f"-{best}"
+    return best, rendered[best], rendered['etag'] + suffix
+
+
+def rendered_response(rendered: dict, accept_encodings, if_none_match) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Build the response for a rendered body, independent of the web framework
+    
+    Clients may keep the body but must revalidate it with its ETag, and
+    get 304 Not Modified while it is unchanged.
+    
+    Args:
+        rendered: Output of render_body
+        accept_encodings: werkzeug Accept object for Accept-Encoding
+        if_none_match: werkzeug ETags object for If-None-Match
+    
+    Returns:
+        Tuple of (status code, headers, body)
+    """
+    coding, body, etag = negotiate(rendered, accept_encodings)
+    headers = {
+        'ETag': f'"{etag}"',
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'no-cache'
+    }
+    if if_none_match.contains_weak(etag):
+        return 304, headers, b''
+    
+    headers['Content-Type'] = 'application/json'
+    if coding != 'identity':
+        headers['Content-Encoding'] = coding
+    return 200, headers, body
\ No newline at end of file
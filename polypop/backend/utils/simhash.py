@@ -0,0 +1,95 @@
+"""
+SimHash fingerprints for near-duplicate result detection
+"""
+import itertools
+from collections import defaultdict
+from typing import List, Optional
+
+import numpy as np
+
+from utils.normalize import tokenize
+
+
+HASH_BITS = 64
+
+# Fingerprints within this many differing bits are near-duplicates
+MAX_DISTANCE = 3
+
+# Fingerprints are split into MAX_DISTANCE + 1 bands; by pigeonhole, two
+# fingerprints within MAX_DISTANCE bits agree exactly on at least one band
+BANDS = MAX_DISTANCE + 1
+BAND_BITS = HASH_BITS // BANDS
+
+# Shorter texts give unreliable fingerprints and are never matched
+MIN_TOKENS = 8
+
+
+def simhash_many(texts: List[str]) -> List[Optional[int]]:
+    """
+    Compute 64-bit SimHash fingerprints for many texts in one pass
+    
+    Every token occurrence votes on each bit of the fingerprint with its
+    hash. Tokens are hashed with Python's built-in string hash, which is
+    cached on the string and stable within a process; fingerprints are
+    only compared within a process, so that is enough.
+    
+    Args:
+        texts: Texts to fingerprint
+    
+    Returns:
+        Fingerprint per text, or None for texts under MIN_TOKENS tokens
+    """
+    token_lists = [tokenize(text) for text in texts]
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    usable = lengths >= MIN_TOKENS
+    if not usable.any():
+        return [None] * len(texts)
+    
+    tokens = list(itertools.chain.from_iterable(
+        token_list for token_list, ok in zip(token_lists, usable) if ok
+    ))
+    hashes = np.fromiter(map(hash, tokens), dtype=np.int64, count=len(tokens)).view(np.uint64)
+    
+    # (bits x tokens) votes, summed per text over its run of tokens
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8).T, axis=0, bitorder='little')
+    starts = np.concatenate(([0], np.cumsum(lengths[usable])[:-1]))
+    ones = np.add.reduceat(bits, starts, axis=1, dtype=np.int32)
+    
+    # Pack the majority bits of each text into one little-endian integer
+    majority = np.packbits(2 * ones > lengths[usable], axis=0, bitorder='little')
+    fingerprints = iter(np.ascontiguousarray(majority.T).view('<u8').ravel().tolist())
+    return [next(fingerprints) if ok else None for ok in usable]
+
+
+class SimHashIndex:
+    """Fingerprints seen so far, banded so lookups stay close to constant time"""
+    
+    def __init__(self):
+        self._bands = [defaultdict(list) for _ in range(BANDS)]
+    
+    def add_if_new(self, fingerprint: int) -> bool:
+        """
+        Index a fingerprint unless a near-duplicate is already indexed
+        
+        Only fingerprints sharing a band are compared, so each call costs
+        a few dict lookups however many fingerprints are indexed.
+        
+        Args:
+            fingerprint: Fingerprint to look up and add
+        
+        Returns:
+            True if it was new and has been indexed
+        """
+        keys = [self._band_key(fingerprint, band) for band in range(BANDS)]
+        for buckets, key in zip(self._bands, keys):
+            for other in buckets.get(key, ()):
+                if bin(fingerprint ^ other).count('1') <= MAX_DISTANCE:
+                    return False
+        
+        for buckets, key in zip(self._bands, keys):
+            buckets[key].append(fingerprint)
+        return True
+    
+    @staticmethod
+    def _band_key(fingerprint: int, band: int) -> int:
+        return (fingerprint >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1)
\ No newline at end of file
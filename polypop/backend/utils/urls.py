@@ -0,0 +1,115 @@
+"""
+Utilities for unwrapping and canonicalizing result URLs
+"""
+import base64
+import binascii
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that only track clicks and never change the page
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'ref_url', 'cmpid', 'spm', '_ga', '_gl', 'ocid', 'smid', 'cvid'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+# Redirects unwrapped at most this many times, e.g. a Bing link to a DDG link
+MAX_UNWRAP_DEPTH = 3
+
+
+def unwrap_redirect(url: str) -> str:
+    """
+    Replace an engine click-tracking redirect with the URL it points to
+    
+    Handles DuckDuckGo '/l/?uddg=' links (often protocol-relative) and
+    Bing '/ck/a?...&u=a1<base64>' links. Other URLs are returned as is,
+    apart from protocol-relative ones gaining 'https:'.
+    
+    Args:
+        url: Result URL as scraped
+    
+    Returns:
+        Target URL
+    """
+    url = url.strip()
+    for _ in range(MAX_UNWRAP_DEPTH):
+        if url.startswith('//'):
+            url = 'https:' + url
+        if 'duckduckgo.com/l/' not in url and 'bing.com/ck/a' not in url:
+            return url
+        
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return url
+        host = (parts.hostname or '').lower()
+        params = dict(parse_qsl(parts.query))
+        target = None
+        
+        if host.endswith('duckduckgo.com') and parts.path.startswith('/l/'):
+            target = params.get('uddg')
+        elif host.endswith('bing.com') and parts.path.startswith('/ck/a'):
+            target = _decode_bing_target(params.get('u', ''))
+        
+        if not target:
+            return url
+        url = target.strip()
+    return url
+
+
+@lru_cache(maxsize=8192)
+def canonicalize_url(url: str) -> str:
+    """
+    Build a comparison key under which copies of the same page match
+    
+    Unwraps redirects, treats http and https alike, lowercases the host
+    and drops 'www.' and default ports, removes tracking parameters and
+    fragments, sorts the remaining parameters and drops trailing slashes.
+    The key is for deduplication only; it is not always a fetchable URL.
+    Popular results recur across queries, so keys are memoized.
+    
+    Args:
+        url: Result URL
+    
+    Returns:
+        Canonical key, the stripped URL itself if it cannot be parsed,
+        or '' for an empty URL
+    """
+    url = unwrap_redirect(url)
+    if not url:
+        return ''
+    
+    # Malformed links (bad port, broken IPv6 brackets) are keyed as scraped
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    
+    query = ''
+    if parts.query:
+        query = urlencode(sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+        ))
+    path = parts.path.rstrip('/')
+    
+    return urlunsplit(('https', host, path, query, ''))
+
+
+def _decode_bing_target(value: str) -> str:
+    """Decode Bing's 'a1' + unpadded URL-safe base64 target parameter"""
+    if not value.startswith('a1'):
+        return ''
+    encoded = value[2:]
+    try:
+        return base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return ''
\ No newline at end of file
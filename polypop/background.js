@@ -9,7 +9,7 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
       .catch((error) => sendResponse({ success: false, error: error.message }));
     return true;
   } else if (request.action === "searchDuckDuckGo") {
-    fetch(`${FLASK_API}/search?q=${encodeURIComponent(request.query)}`)
+    fetch(`${FLASK_API}/search?q=${encodeURIComponent(request.query)}&fields=context&context_budget=1000`)
       .then((response) => response.json())
       .then((data) => {
         sendResponse({ success: data.success, data: data.context });